@@ -3,84 +3,228 @@
 שולח תמונות ל-GPT-4o לאימות רכב מול נתונים ממשלתיים.
 """
 
+import asyncio
 import base64
-import json
+import hashlib
 import logging
+import re
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from typing import Optional
 
-from openai import AsyncOpenAI
+import cv2
+import httpx
+import orjson
+from openai import (
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from PIL import Image
 
 from backend.config import config
+from backend.database import db
 from backend.models import GovData, AIAnalysis
 
 logger = logging.getLogger("MoonGuard.AI")
 
+# לקוח HTTP משותף - מאגר חיבורים רחב ו-HTTP/2 כדי שקריאות מקבילות לא ימתינו לחיבור פנוי
+_http_client = httpx.AsyncClient(
+    timeout=60,
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+
 # יצירת לקוח OpenAI
-client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+client = AsyncOpenAI(
+    api_key=config.OPENAI_API_KEY,
+    http_client=_http_client,
+    max_retries=2
+)
+
+# קריאות Vision עוברות דרך _create_completion שמנהל ניסיונות חוזרים בעצמו
+_chat_client = client.with_options(max_retries=0)
+
+# שגיאות זמניות (429, 5xx, ניתוק, timeout) שמצדיקות ניסיון חוזר
+_RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+_MAX_ATTEMPTS = 4
+
+# הגבלת מספר הקריאות המקבילות ל-Vision, כדי שפרץ אירועים לא יחרוג ממגבלת הקצב
+_VISION_SEM = asyncio.Semaphore(config.OPENAI_MAX_CONCURRENCY)
+
+# שדה JSON סקלרי שהושלם בתוך תשובה חלקית (מספר נחשב שלם רק כשמגיע אחריו מפריד)
+_SCALAR_FIELD_RE = re.compile(
+    r'"(\w+)"\s*:\s*(true|false|null|-?\d+(?=\s*[,}\n])|"(?:[^"\\]|\\.)*")'
+)
+
 
+async def close_ai_client() -> None:
+    """סגירת לקוח ה-HTTP המשותף (בעת כיבוי השרת)."""
+    await _http_client.aclose()
 
-def encode_image_to_base64(image_path: Path) -> str:
+
+async def _create_completion(**request):
     """
-    קידוד תמונה ל-Base64.
+    קריאה ל-chat.completions.create עם ניסיונות חוזרים ו-backoff מעריכי.
+    
+    שגיאה זמנית ממתינה 1, 2, 4 שניות בין הניסיונות; שגיאה אחרת,
+    או כישלון בניסיון האחרון, נזרקת לקורא. כל ניסיון ממתין למקום
+    פנוי ב-_VISION_SEM, וההמתנה בין ניסיונות אינה תופסת מקום.
+    
+    Args:
+        **request: פרמטרים ל-chat.completions.create
+        
+    Returns:
+        תשובת ה-API (או זרם, אם stream=True)
+    """
+    for attempt in range(_MAX_ATTEMPTS):
+        try:
+            async with _VISION_SEM:
+                return await _chat_client.chat.completions.create(**request)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == _MAX_ATTEMPTS - 1:
+                raise
+            delay = 2 ** attempt
+            logger.warning(
+                f"שגיאה זמנית מ-OpenAI ({type(e).__name__}), "
+                f"ניסיון חוזר בעוד {delay} שניות"
+            )
+            await asyncio.sleep(delay)
+
+
+def _prep_image(image_path: Path) -> tuple[str, str]:
+    """
+    הקטנת תמונה וקידודה ל-Base64 לפני שליחה ל-Vision.
+    
+    התמונה מוקטנת לצלע ארוכה של עד 1024 פיקסלים ונשמרת מחדש כ-JPEG,
+    כך שנשלחים פחות בתים ומחויבים פחות אריחי Vision.
     
     Args:
         image_path: נתיב לקובץ התמונה
         
     Returns:
-        מחרוזת Base64 של התמונה
+        tuple של (מחרוזת Base64, סוג מדיה)
+    """
+    with Image.open(image_path) as img:
+        img.thumbnail((1024, 1024), Image.LANCZOS)
+        buffer = BytesIO()
+        img.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8"), "image/jpeg"
+
+
+@lru_cache(maxsize=16)
+def _encode_cached(path_str: str, mtime_ns: int, size: int) -> tuple[str, str]:
+    """
+    הכנת תמונה (הקטנה וקידוד) עם מטמון.
+    
+    המפתח כולל את זמן השינוי והגודל, כך שקובץ שהשתנה מקודד מחדש.
+    
+    Args:
+        path_str: נתיב לקובץ התמונה
+        mtime_ns: זמן שינוי אחרון (ננו-שניות)
+        size: גודל הקובץ בבתים
+        
+    Returns:
+        tuple של (מחרוזת Base64, סוג מדיה)
     """
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
+    return _prep_image(Path(path_str))
 
 
-def get_image_media_type(image_path: Path) -> str:
+def _encode_image_sync(image_path: Path) -> tuple[str, str]:
     """
-    קבלת סוג המדיה של התמונה.
+    קידוד סינכרוני של תמונה דרך המטמון.
     
     Args:
         image_path: נתיב לקובץ התמונה
         
     Returns:
-        סוג המדיה (MIME type)
+        tuple של (מחרוזת Base64 של התמונה, סוג המדיה)
     """
-    suffix = image_path.suffix.lower()
-    media_types = {
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".png": "image/png"
-    }
-    return media_types.get(suffix, "image/jpeg")
+    stat = image_path.stat()
+    return _encode_cached(str(image_path), stat.st_mtime_ns, stat.st_size)
 
 
-async def analyze_vehicle_image(
-    image_path: Path,
-    gov_data: GovData,
-    lpr: str
-) -> AIAnalysis:
+async def encode_image_to_base64(image_path: Path) -> tuple[str, str]:
     """
-    ניתוח תמונת רכב באמצעות OpenAI Vision.
+    קידוד תמונה ל-Base64.
+    
+    הקריאה מהדיסק והקידוד רצים ב-thread נפרד כדי לא לחסום את לולאת האירועים.
     
     Args:
-        image_path: נתיב לתמונה
-        gov_data: נתוני הרכב מה-API הממשלתי
-        lpr: מספר לוחית הרישוי
+        image_path: נתיב לקובץ התמונה
         
     Returns:
-        אובייקט AIAnalysis עם תוצאות הניתוח
+        tuple של (מחרוזת Base64 של התמונה, סוג המדיה)
     """
-    if not image_path.exists():
-        logger.error(f"קובץ תמונה לא נמצא: {image_path}")
-        return AIAnalysis(
-            scene_description="שגיאה: קובץ לא נמצא",
-            target_found=False,
-            confidence=0
-        )
+    return await asyncio.to_thread(_encode_image_sync, image_path)
+
+
+async def _stream_json_fields(required: tuple[str, ...], **request) -> dict:
+    """
+    שליחת בקשה במצב streaming ופענוח שדות JSON תוך כדי קבלת התשובה.
     
-    # בניית תיאור הרכב הצפוי
-    expected_desc = f"צבע: {gov_data.color}, יצרן: {gov_data.manufacturer}, דגם: {gov_data.model}"
+    ברגע שכל השדות הנדרשים פוענחו הזרם נסגר, כך שלא ממתינים
+    (ולא משלמים) על שאר הטוקנים.
     
-    system_prompt = """אתה מערכת אימות חזותי לרכבים.
+    Args:
+        required: שמות השדות הדרושים לקבלת החלטה
+        **request: פרמטרים ל-chat.completions.create
+        
+    Returns:
+        מילון השדות שפוענחו
+    """
+    stream = await _create_completion(stream=True, **request)
+    
+    buffer = ""
+    scan_pos = 0
+    fields: dict = {}
+    try:
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            buffer += chunk.choices[0].delta.content
+            
+            for match in _SCALAR_FIELD_RE.finditer(buffer, scan_pos):
+                fields[match.group(1)] = orjson.loads(match.group(2))
+                scan_pos = match.end()
+            
+            if all(key in fields for key in required):
+                break
+    finally:
+        await stream.close()
+    
+    if all(key in fields for key in required):
+        return fields
+    
+    # הזרם הסתיים בלי כל השדות - פרסור של התשובה המלאה
+    return orjson.loads(buffer)
+
+
+def _analysis_from_result(result: dict) -> AIAnalysis:
+    """
+    בניית אובייקט AIAnalysis מתשובת JSON של המודל.
+    
+    Args:
+        result: מילון שדות האימות מהתשובה
+        
+    Returns:
+        אובייקט AIAnalysis
+    """
+    return AIAnalysis(
+        scene_description=result.get("scene_description", ""),
+        detected_manufacturer=result.get("detected_manufacturer"),
+        target_found=result.get("target_found", False),
+        confidence=int(result.get("confidence", 0)),
+        best_match_details=result.get("best_match_details"),
+        reasoning=result.get("reasoning")
+    )
+
+
+# הנחיות מערכת קבועות - זהות בכל קריאה, כך שהתחילית נשמרת ב-prompt caching של OpenAI
+_VERIFY_SYSTEM_PROMPT = """אתה מערכת אימות חזותי לרכבים.
 תפקידך לנתח תמונות ולאמת האם הרכב בתמונה תואם לנתונים הרשומים.
 
 הנחיות חשובות:
@@ -107,6 +251,28 @@ async def analyze_vehicle_image(
     "reasoning": "הסבר קצר"
 }"""
 
+
+def _verification_request(
+    image_base64: str,
+    media_type: str,
+    gov_data: GovData,
+    lpr: str
+) -> dict:
+    """
+    בניית גוף הבקשה לאימות רכב (משותף לקריאה ישירה ול-Batch API).
+    
+    Args:
+        image_base64: התמונה בקידוד Base64
+        media_type: סוג המדיה של התמונה
+        gov_data: נתוני הרכב מה-API הממשלתי
+        lpr: מספר לוחית הרישוי
+        
+    Returns:
+        מילון פרמטרים ל-chat.completions.create
+    """
+    # בניית תיאור הרכב הצפוי
+    expected_desc = f"צבע: {gov_data.color}, יצרן: {gov_data.manufacturer}, דגם: {gov_data.model}"
+    
     user_prompt = f"""מספר לוחית רישוי: {lpr}
 נתונים רשומים: {expected_desc}
 
@@ -114,74 +280,143 @@ async def analyze_vehicle_image(
 אם היצרן תואם ל-"{gov_data.manufacturer}" - זהו אימות מוצלח.
 החזר JSON בלבד."""
 
+    return {
+        "model": config.OPENAI_MODEL,
+        "messages": [
+            {"role": "system", "content": _VERIFY_SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": user_prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{media_type};base64,{image_base64}",
+                            "detail": "high"
+                        }
+                    }
+                ]
+            }
+        ],
+        "response_format": {"type": "json_object"},
+        "max_tokens": 500,
+        "temperature": 0.1
+    }
+
+
+def _parse_error_analysis() -> AIAnalysis:
+    """
+    ניתוח ברירת מחדל כאשר תשובת המודל אינה JSON תקין.
+    
+    Returns:
+        אובייקט AIAnalysis ריק עם סימון שגיאת פרסור
+    """
+    return AIAnalysis(
+        scene_description="שגיאה בפרסור התשובה",
+        target_found=False,
+        confidence=0,
+        reasoning="שגיאה בפרסור התשובה"
+    )
+
+
+def _parse_analysis_content(content: str) -> AIAnalysis:
+    """
+    פרסור תשובת המודל לאובייקט AIAnalysis.
+    
+    Args:
+        content: טקסט התשובה
+        
+    Returns:
+        אובייקט AIAnalysis (עם ערכי ברירת מחדל אם הפרסור נכשל)
+    """
+    try:
+        return _analysis_from_result(orjson.loads(content))
+        
+    except orjson.JSONDecodeError as e:
+        logger.warning(f"שגיאה בפרסור תשובת AI: {e}")
+        return _parse_error_analysis()
+
+
+def _analysis_cache_key(kind: str, image_base64: str, gov_data: GovData, lpr: str) -> str:
+    """
+    מפתח מטמון לתוצאת ניתוח - hash של התמונה המוקטנת יחד עם הלוחית והיצרן.
+    
+    Args:
+        kind: סוג הניתוח (verify / full)
+        image_base64: התמונה המוקטנת בקידוד Base64
+        gov_data: נתוני הרכב מה-API הממשלתי
+        lpr: מספר לוחית הרישוי
+        
+    Returns:
+        מחרוזת SHA-256 הקסדצימלית
+    """
+    digest = hashlib.sha256(f"{kind}|{lpr}|{gov_data.manufacturer}|".encode("utf-8"))
+    digest.update(image_base64.encode("ascii"))
+    return digest.hexdigest()
+
+
+async def analyze_vehicle_image(
+    image_path: Path,
+    gov_data: GovData,
+    lpr: str,
+    image_data: Optional[tuple[str, str]] = None
+) -> AIAnalysis:
+    """
+    ניתוח תמונת רכב באמצעות OpenAI Vision.
+    
+    Args:
+        image_path: נתיב לתמונה
+        gov_data: נתוני הרכב מה-API הממשלתי
+        lpr: מספר לוחית הרישוי
+        image_data: תמונה מקודדת מראש וסוג המדיה (אופציונלי)
+        
+    Returns:
+        אובייקט AIAnalysis עם תוצאות הניתוח
+    """
+    if not image_path.exists():
+        logger.error(f"קובץ תמונה לא נמצא: {image_path}")
+        return AIAnalysis(
+            scene_description="שגיאה: קובץ לא נמצא",
+            target_found=False,
+            confidence=0
+        )
+    
     try:
         # קידוד התמונה
-        image_base64 = encode_image_to_base64(image_path)
-        media_type = get_image_media_type(image_path)
+        image_base64, media_type = image_data or await encode_image_to_base64(image_path)
+        
+        # בדיקה במטמון - תמונה זהה כבר נותחה
+        cache_key = _analysis_cache_key("verify", image_base64, gov_data, lpr)
+        cached = await db.get_cached_analysis(cache_key)
+        if cached is not None:
+            logger.info(f"תוצאת ניתוח מהמטמון: {image_path.name}")
+            return _analysis_from_result(cached)
         
         logger.info(f"שולח תמונה לניתוח AI: {image_path.name}")
         
-        response = await client.chat.completions.create(
-            model=config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{media_type};base64,{image_base64}",
-                                "detail": "high"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=500,
-            temperature=0.1
+        response = await _create_completion(
+            **_verification_request(image_base64, media_type, gov_data, lpr),
+            extra_body={"prompt_cache_key": "moonguard_verify"}
         )
         
         # פרסור התשובה
         content = response.choices[0].message.content
-        
-        # ניסיון לחלץ JSON מהתשובה
         try:
-            # מחפש JSON בתוך הטקסט
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                result = json.loads(json_str)
-            else:
-                raise ValueError("לא נמצא JSON בתשובה")
-            
-            analysis = AIAnalysis(
-                scene_description=result.get("scene_description", ""),
-                detected_manufacturer=result.get("detected_manufacturer"),
-                target_found=result.get("target_found", False),
-                confidence=int(result.get("confidence", 0)),
-                best_match_details=result.get("best_match_details"),
-                reasoning=result.get("reasoning")
-            )
-            
-            logger.info(
-                f"תוצאת ניתוח: found={analysis.target_found}, "
-                f"confidence={analysis.confidence}%"
-            )
-            
-            return analysis
-            
-        except (json.JSONDecodeError, ValueError) as e:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
             logger.warning(f"שגיאה בפרסור תשובת AI: {e}")
-            return AIAnalysis(
-                scene_description=content[:200],
-                target_found=False,
-                confidence=0,
-                reasoning="שגיאה בפרסור התשובה"
-            )
-            
+            return _parse_error_analysis()
+        
+        await db.save_cached_analysis(cache_key, result)
+        analysis = _analysis_from_result(result)
+        
+        logger.info(
+            f"תוצאת ניתוח: found={analysis.target_found}, "
+            f"confidence={analysis.confidence}%"
+        )
+        
+        return analysis
+        
     except Exception as e:
         logger.error(f"שגיאה בניתוח AI: {e}")
         return AIAnalysis(
@@ -191,7 +426,21 @@ async def analyze_vehicle_image(
         )
 
 
-async def pre_screen_image(image_path: Path) -> dict:
+_PRE_SCREEN_SYSTEM_PROMPT = """אתה מערכת סינון מקדים לתמונות.
+בדוק האם התמונה מכילה אחד מהמקרים הבאים שיש להתעלם מהם:
+
+1. אדם (לא רכב) - תמונה שבה אדם הוא הנושא המרכזי
+2. מונית - רכב עם שלט מונית על הגג או סימני מונית ברורים
+3. רכב צהוב לחלוטין - רכב שכל גופו צהוב (לא רק לוחית)
+
+החזר תשובה בפורמט JSON בלבד:
+{
+    "skip": true/false,
+    "reason": "person" / "taxi" / "yellow_vehicle" / "none"
+}"""
+
+
+async def pre_screen_image(image_path: Path, image_data: Optional[tuple[str, str]] = None) -> dict:
     """
     סינון מקדים של תמונה - בדיקה אם יש לדלג על הניתוח.
     
@@ -201,6 +450,7 @@ async def pre_screen_image(image_path: Path) -> dict:
     
     Args:
         image_path: נתיב לקובץ התמונה
+        image_data: תמונה מקודדת מראש וסוג המדיה (אופציונלי)
         
     Returns:
         מילון עם: skip (bool), reason (str)
@@ -208,27 +458,14 @@ async def pre_screen_image(image_path: Path) -> dict:
     if not image_path.exists():
         return {"skip": False, "reason": ""}
     
-    system_prompt = """אתה מערכת סינון מקדים לתמונות.
-בדוק האם התמונה מכילה אחד מהמקרים הבאים שיש להתעלם מהם:
-
-1. אדם (לא רכב) - תמונה שבה אדם הוא הנושא המרכזי
-2. מונית - רכב עם שלט מונית על הגג או סימני מונית ברורים
-3. רכב צהוב לחלוטין - רכב שכל גופו צהוב (לא רק לוחית)
-
-החזר תשובה בפורמט JSON בלבד:
-{
-    "skip": true/false,
-    "reason": "person" / "taxi" / "yellow_vehicle" / "none"
-}"""
-
     try:
-        image_base64 = encode_image_to_base64(image_path)
-        media_type = get_image_media_type(image_path)
+        image_base64, media_type = image_data or await encode_image_to_base64(image_path)
         
-        response = await client.chat.completions.create(
+        result = await _stream_json_fields(
+            ("skip", "reason"),
             model=config.OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": _PRE_SCREEN_SYSTEM_PROMPT},
                 {
                     "role": "user",
                     "content": [
@@ -243,50 +480,60 @@ async def pre_screen_image(image_path: Path) -> dict:
                     ]
                 }
             ],
+            response_format={"type": "json_object"},
             max_tokens=100,
-            temperature=0.1
+            temperature=0.1,
+            extra_body={"prompt_cache_key": "moonguard_pre_screen"}
         )
         
-        content = response.choices[0].message.content
-        
-        try:
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                result = json.loads(content[json_start:json_end])
-                skip = result.get("skip", False)
-                reason = result.get("reason", "none")
-                if skip:
-                    logger.info(f"סינון מקדים: דילוג על תמונה - סיבה: {reason}")
-                return {"skip": skip, "reason": reason}
-        except:
-            pass
-            
-        return {"skip": False, "reason": "none"}
+        skip = result.get("skip", False)
+        reason = result.get("reason", "none")
+        if skip:
+            logger.info(f"סינון מקדים: דילוג על תמונה - סיבה: {reason}")
+        return {"skip": skip, "reason": reason}
         
     except Exception as e:
         logger.error(f"שגיאה בסינון מקדים: {e}")
         return {"skip": False, "reason": "error"}
 
 
-async def detect_yellow_plate(image_path: Path) -> bool:
+def _fast_yellow_plate(image_path: Path) -> bool:
     """
-    בדיקה האם קיימת לוחית רישוי צהובה בתמונה.
+    בדיקה מקומית מהירה (OpenCV) לזיהוי לוחית צהובה.
     
-    לוחיות רישוי ישראליות הן צהובות עם מספרים שחורים.
-    פונקציה זו בודקת האם יש לפחות לוחית אחת כזו בתמונה.
+    מחפש אזור צהוב מלא בצורת מלבן ביחס רוחב-גובה של לוחית רישוי.
+    תוצאה חיובית מספיקה; תוצאה שלילית אינה מוכיחה שאין לוחית
+    (צילום לילה / אינפרא-אדום), ולכן אז עוברים לבדיקת Vision.
     
     Args:
         image_path: נתיב לקובץ התמונה
         
     Returns:
-        True אם נמצאה לוחית צהובה, False אחרת
+        True אם נמצא אזור בצורת לוחית צהובה
     """
-    if not image_path.exists():
-        logger.error(f"קובץ תמונה לא נמצא: {image_path}")
+    img = cv2.imread(str(image_path))
+    if img is None:
         return False
     
-    system_prompt = """אתה מערכת זיהוי לוחיות רישוי.
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, (15, 100, 100), (35, 255, 255))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    max_area = img.shape[0] * img.shape[1] / 4
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        area = w * h
+        # גודל סביר, יחס של לוחית, ומילוי מלבני (לא גוף רכב צהוב או כתם)
+        if (
+            2000 < area < max_area
+            and 2.0 < w / h < 5.5
+            and cv2.contourArea(contour) > 0.6 * area
+        ):
+            return True
+    return False
+
+
+_YELLOW_PLATE_SYSTEM_PROMPT = """אתה מערכת זיהוי לוחיות רישוי.
 תפקידך לזהות האם יש לוחית רישוי ישראלית צהובה בתמונה.
 
 לוחיות רישוי ישראליות:
@@ -301,48 +548,67 @@ async def detect_yellow_plate(image_path: Path) -> bool:
     "description": "תיאור קצר של מה שנמצא"
 }"""
 
-    user_prompt = """בדוק את התמונה וקבע האם יש בה לוחית רישוי ישראלית צהובה.
+_YELLOW_PLATE_USER_PROMPT = """בדוק את התמונה וקבע האם יש בה לוחית רישוי ישראלית צהובה.
 אם אתה רואה לוחית מלבנית צהובה עם מספרים - זו לוחית רישוי.
 החזר תשובה בפורמט JSON בלבד."""
 
+
+async def detect_yellow_plate(image_path: Path, image_data: Optional[tuple[str, str]] = None) -> bool:
+    """
+    בדיקה האם קיימת לוחית רישוי צהובה בתמונה.
+    
+    לוחיות רישוי ישראליות הן צהובות עם מספרים שחורים.
+    פונקציה זו בודקת האם יש לפחות לוחית אחת כזו בתמונה.
+    
+    Args:
+        image_path: נתיב לקובץ התמונה
+        image_data: תמונה מקודדת מראש וסוג המדיה (אופציונלי)
+        
+    Returns:
+        True אם נמצאה לוחית צהובה, False אחרת
+    """
+    if not image_path.exists():
+        logger.error(f"קובץ תמונה לא נמצא: {image_path}")
+        return False
+    
+    # בדיקה מקומית - זיהוי חיובי חוסך את קריאת ה-Vision
+    try:
+        if await asyncio.to_thread(_fast_yellow_plate, image_path):
+            logger.info(f"לוחית צהובה זוהתה בבדיקה מקומית: {image_path.name}")
+            return True
+    except Exception as e:
+        logger.warning(f"שגיאה בבדיקה מקומית של לוחית צהובה: {e}")
+    
     try:
-        image_base64 = encode_image_to_base64(image_path)
-        media_type = get_image_media_type(image_path)
+        image_base64, media_type = image_data or await encode_image_to_base64(image_path)
         
         logger.info(f"בודק לוחית צהובה בתמונה: {image_path.name}")
         
-        response = await client.chat.completions.create(
-            model=config.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{media_type};base64,{image_base64}",
-                                "detail": "low"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=200,
-            temperature=0.1
-        )
-        
-        content = response.choices[0].message.content
-        
         try:
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
-                result = json.loads(json_str)
-            else:
-                raise ValueError("לא נמצא JSON בתשובה")
+            result = await _stream_json_fields(
+                ("yellow_plate_found", "confidence"),
+                model=config.OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": _YELLOW_PLATE_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": _YELLOW_PLATE_USER_PROMPT},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{media_type};base64,{image_base64}",
+                                    "detail": "low"
+                                }
+                            }
+                        ]
+                    }
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=200,
+                temperature=0.1,
+                extra_body={"prompt_cache_key": "moonguard_yellow_plate"}
+            )
             
             found = result.get("yellow_plate_found", False)
             confidence = result.get("confidence", 0)
@@ -351,7 +617,7 @@ async def detect_yellow_plate(image_path: Path) -> bool:
             
             return found and confidence >= 50
             
-        except (json.JSONDecodeError, ValueError) as e:
+        except orjson.JSONDecodeError as e:
             logger.warning(f"שגיאה בפרסור תשובת זיהוי לוחית: {e}")
             return False
             
@@ -359,3 +625,265 @@ async def detect_yellow_plate(image_path: Path) -> bool:
         logger.error(f"שגיאה בזיהוי לוחית צהובה: {e}")
         return False
 
+
+_FULL_ANALYSIS_SYSTEM_PROMPT = """אתה מערכת ניתוח חזותי לרכבים.
+עליך לבצע שלוש בדיקות על אותה תמונה ולהחזיר תשובה אחת.
+
+שלב 1 - סינון מקדים:
+בדוק האם התמונה מכילה אחד מהמקרים הבאים שיש להתעלם מהם:
+1. אדם (לא רכב) - תמונה שבה אדם הוא הנושא המרכזי
+2. מונית - רכב עם שלט מונית על הגג או סימני מונית ברורים
+3. רכב צהוב לחלוטין - רכב שכל גופו צהוב (לא רק לוחית)
+
+שלב 2 - זיהוי לוחית רישוי צהובה:
+לוחיות רישוי ישראליות:
+- צבע רקע צהוב בהיר
+- מספרים ואותיות בשחור
+- לרוב פס כחול בצד עם אותיות IL
+אם אתה רואה לוחית מלבנית צהובה עם מספרים - זו לוחית רישוי.
+
+שלב 3 - אימות הרכב מול הנתונים הרשומים:
+1. התמקד בזיהוי היצרן - זהו הקריטריון המרכזי לאימות
+2. אם היצרן בתמונה תואם ליצרן הרשום - זה אימות מוצלח (target_found=true)
+3. התעלם מהבדלי צבע קלים או גוונים שונים
+4. התעלם מהבדלים בדגם ספציפי כל עוד היצרן תואם
+5. הייה סובלני - דווח על אי-התאמה רק אם יש הבדל ברור וחד משמעי ביצרן
+6. אם אין נתונים רשומים - תאר את הרכב והחזר target_found=false
+
+פורמט התשובה (JSON בלבד):
+{
+    "skip": true/false,
+    "reason": "person" / "taxi" / "yellow_vehicle" / "none",
+    "yellow_plate": {
+        "yellow_plate_found": true/false,
+        "confidence": 0-100,
+        "description": "תיאור קצר של מה שנמצא"
+    },
+    "verification": {
+        "scene_description": "תיאור קצר של הסצנה והרכב",
+        "detected_manufacturer": "היצרן שזוהה בתמונה",
+        "target_found": true/false,
+        "confidence": 0-100,
+        "best_match_details": "תיאור הרכב שזוהה",
+        "reasoning": "הסבר קצר"
+    }
+}"""
+
+
+async def analyze_vehicle_full(
+    image_path: Path,
+    gov_data: GovData,
+    lpr: str
+) -> dict:
+    """
+    ניתוח מלא של תמונה בקריאה אחת ל-OpenAI Vision.
+    
+    מאחד את הסינון המקדים, זיהוי הלוחית הצהובה ואימות הרכב
+    לבקשה אחת - התמונה מקודדת ונשלחת פעם אחת בלבד.
+    
+    Args:
+        image_path: נתיב לתמונה
+        gov_data: נתוני הרכב מה-API הממשלתי
+        lpr: מספר לוחית הרישוי
+        
+    Returns:
+        מילון עם: skip (bool), reason (str), yellow_plate_found (bool),
+        analysis (AIAnalysis)
+    """
+    if not image_path.exists():
+        logger.error(f"קובץ תמונה לא נמצא: {image_path}")
+        return {
+            "skip": False,
+            "reason": "",
+            "yellow_plate_found": False,
+            "analysis": AIAnalysis(
+                scene_description="שגיאה: קובץ לא נמצא",
+                target_found=False,
+                confidence=0
+            )
+        }
+    
+    if gov_data.found:
+        expected_desc = f"צבע: {gov_data.color}, יצרן: {gov_data.manufacturer}, דגם: {gov_data.model}"
+        user_prompt = f"""מספר לוחית רישוי: {lpr}
+נתונים רשומים: {expected_desc}
+
+בצע את שלושת השלבים.
+אם היצרן תואם ל-"{gov_data.manufacturer}" - זהו אימות מוצלח.
+החזר JSON בלבד."""
+    else:
+        user_prompt = f"""מספר לוחית רישוי: {lpr}
+נתונים רשומים: אין
+
+בצע את שלושת השלבים.
+החזר JSON בלבד."""
+
+    try:
+        image_base64, media_type = await encode_image_to_base64(image_path)
+        
+        cache_key = _analysis_cache_key("full", image_base64, gov_data, lpr)
+        result = await db.get_cached_analysis(cache_key)
+        
+        if result is not None:
+            logger.info(f"תוצאת ניתוח מאוחד מהמטמון: {image_path.name}")
+        else:
+            logger.info(f"שולח תמונה לניתוח AI מאוחד: {image_path.name}")
+            
+            response = await _create_completion(
+                model=config.OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": _FULL_ANALYSIS_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": user_prompt},
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:{media_type};base64,{image_base64}",
+                                    "detail": "high"
+                                }
+                            }
+                        ]
+                    }
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=600,
+                temperature=0.1,
+                extra_body={"prompt_cache_key": "moonguard_full"}
+            )
+            
+            content = response.choices[0].message.content
+            
+            try:
+                result = orjson.loads(content)
+            except orjson.JSONDecodeError as e:
+                logger.warning(f"שגיאה בפרסור תשובת AI: {e}")
+                return {
+                    "skip": False,
+                    "reason": "error",
+                    "yellow_plate_found": False,
+                    "analysis": _parse_error_analysis()
+                }
+            
+            await db.save_cached_analysis(cache_key, result)
+        
+        skip = result.get("skip", False)
+        reason = result.get("reason", "none")
+        if skip:
+            logger.info(f"סינון מקדים: דילוג על תמונה - סיבה: {reason}")
+        
+        yellow = result.get("yellow_plate") or {}
+        yellow_found = yellow.get("yellow_plate_found", False)
+        yellow_confidence = yellow.get("confidence", 0)
+        
+        analysis = _analysis_from_result(result.get("verification") or {})
+        
+        logger.info(
+            f"תוצאת ניתוח מאוחד: skip={skip}, "
+            f"yellow_plate={yellow_found} ({yellow_confidence}%), "
+            f"found={analysis.target_found}, confidence={analysis.confidence}%"
+        )
+        
+        return {
+            "skip": skip,
+            "reason": reason,
+            "yellow_plate_found": bool(yellow_found and yellow_confidence >= 50),
+            "analysis": analysis
+        }
+        
+    except Exception as e:
+        logger.error(f"שגיאה בניתוח AI מאוחד: {e}")
+        return {
+            "skip": False,
+            "reason": "error",
+            "yellow_plate_found": False,
+            "analysis": AIAnalysis(
+                scene_description=f"שגיאה: {str(e)}",
+                target_found=False,
+                confidence=0
+            )
+        }
+
+
+async def submit_batch_analysis(items: list[tuple[Path, GovData, str]]) -> str:
+    """
+    שליחת אימות רכבים רבים דרך OpenAI Batch API.
+    
+    מיועד לעיבוד לא אינטראקטיבי (ניתוח חוזר או ייבוא היסטורי) -
+    בעלות נמוכה יותר ובלי המתנה לכל תמונה בנפרד.
+    
+    Args:
+        items: רשימת tuples של (נתיב תמונה, נתוני רכב, לוחית רישוי)
+        
+    Returns:
+        מזהה ה-batch שנוצר
+    """
+    lines = []
+    for image_path, gov_data, lpr in items:
+        image_base64, media_type = await encode_image_to_base64(image_path)
+        lines.append(orjson.dumps({
+            "custom_id": image_path.name,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _verification_request(image_base64, media_type, gov_data, lpr)
+        }))
+    
+    batch_file = await client.files.create(
+        file=("moonguard_batch.jsonl", b"\n".join(lines)),
+        purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    
+    logger.info(f"נשלח batch לניתוח AI: {batch.id} ({len(lines)} תמונות)")
+    return batch.id
+
+
+async def wait_for_batch(batch_id: str, poll_interval: float = 30.0) -> dict[str, AIAnalysis]:
+    """
+    המתנה לסיום batch ושליפת התוצאות.
+    
+    Args:
+        batch_id: מזהה ה-batch
+        poll_interval: זמן המתנה בין בדיקות סטטוס (בשניות)
+        
+    Returns:
+        מילון של שם קובץ התמונה -> AIAnalysis
+    """
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            break
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.error(f"batch {batch_id} הסתיים בסטטוס {batch.status}")
+            return {}
+        await asyncio.sleep(poll_interval)
+    
+    if not batch.output_file_id:
+        return {}
+    
+    output = await client.files.content(batch.output_file_id)
+    
+    results = {}
+    for line in output.content.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            logger.warning(f"שגיאה בניתוח batch עבור {item.get('custom_id')}: {item.get('error')}")
+            results[item["custom_id"]] = AIAnalysis(
+                scene_description="שגיאה בניתוח batch",
+                target_found=False,
+                confidence=0
+            )
+            continue
+        content = response["body"]["choices"][0]["message"]["content"]
+        results[item["custom_id"]] = _parse_analysis_content(content)
+    
+    logger.info(f"batch {batch_id} הושלם: {len(results)} תוצאות")
+    return results
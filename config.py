@@ -17,10 +17,20 @@ class Config:
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = "gpt-4o"
+    # מספר מקסימלי של קריאות Vision במקביל (לפי מגבלת הקצב של החשבון)
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "50"))
     
     # Server
     SERVER_HOST: str = os.getenv("SERVER_HOST", "0.0.0.0")
     SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8090"))
+    # מספר תהליכי uvicorn (WEB_CONCURRENCY הוא השם המקובל)
+    SERVER_WORKERS: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # מצב פיתוח: טעינה מחדש אוטומטית ו-CORS פתוח לכל מקור
+    DEV: bool = os.getenv("DEV", "0") == "1"
+    # מקורות מורשים ל-CORS מחוץ למצב פיתוח, מופרדים בפסיק (ריק = ללא CORS)
+    CORS_ORIGINS: list = [
+        origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()
+    ]
     
     # Database
     DATABASE_PATH: Path = Path(os.getenv("DATABASE_PATH", "./moonguard.db"))
@@ -32,6 +42,13 @@ class Config:
     # Government API
     GOV_API_URL: str = "https://data.gov.il/api/3/action/datastore_search"
     GOV_API_TIMEOUT: int = 10
+    # חיפוש בכל המאגרים במקביל (כבוי = אחד אחרי השני לפי הסדר)
+    GOV_PARALLEL: bool = os.getenv("GOV_PARALLEL", "1") == "1"
+    # מטמון נתוני רכב לפי לוחית
+    GOV_CACHE_SIZE: int = int(os.getenv("GOV_CACHE_SIZE", "4096"))
+    GOV_CACHE_TTL: int = int(os.getenv("GOV_CACHE_TTL", "3600"))
+    # תוצאה שלילית (לא נמצא / שגיאה) נשמרת לזמן קצר בלבד
+    GOV_NEGATIVE_CACHE_TTL: int = int(os.getenv("GOV_NEGATIVE_CACHE_TTL", "30"))
     
     # מאגרי רכבים ממשלתיים
     GOV_DATABASES: dict = {
@@ -113,9 +130,30 @@ class Config:
     # File Processing
     VALID_EXTENSIONS: tuple = (".jpg", ".jpeg", ".png")
     LPR_VALID_LENGTHS: tuple = (7, 8)
+    # מספר נתיבי קבצים אחרונים שנשמרים למניעת עיבוד כפול
+    PROCESSED_CACHE_SIZE: int = int(os.getenv("PROCESSED_CACHE_SIZE", "8192"))
+    # מרווח בדיקת יציבות גודל קובץ חדש לפני עיבודו (שניות)
+    FILE_STABLE_POLL_INTERVAL: float = float(os.getenv("FILE_STABLE_POLL_INTERVAL", "0.05"))
+    # ניטור ב-polling (נבחר אוטומטית לכונני רשת, או תמיד כשמופעל)
+    FORCE_POLLING: bool = os.getenv("FORCE_POLLING", "0") == "1"
+    WATCH_POLL_INTERVAL: float = float(os.getenv("WATCH_POLL_INTERVAL", "5"))
+    # מספר threads לפעולות קבצים (מחיקה / העברה לתיקיית מעובדים)
+    FS_MAX_WORKERS: int = int(os.getenv("FS_MAX_WORKERS", "4"))
+    # מספר מקסימלי של קבצים בעיבוד במקביל (ממשלתי + AI + מסד נתונים)
+    MAX_CONCURRENT_CALLBACKS: int = int(os.getenv("MAX_CONCURRENT_CALLBACKS", "8"))
+    
+    # WebSocket
+    # ערוץ Redis לשידור בין כמה workers (ריק = שידור מקומי בלבד)
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    # חלון איחוד עדכוני סטטיסטיקות לפני שידור (שניות)
+    STATS_DEBOUNCE_INTERVAL: float = float(os.getenv("STATS_DEBOUNCE_INTERVAL", "0.2"))
+    # תוקף מטמון הסטטיסטיקות (מתאפס גם בכל שינוי באירועים)
+    STATS_CACHE_TTL: float = float(os.getenv("STATS_CACHE_TTL", "1.0"))
     
     # AI Analysis
     AI_CONFIDENCE_THRESHOLD: int = 75
+    # ניתוח מאוחד בקריאה אחת (כבוי = סינון, לוחית צהובה ואימות בקריאות נפרדות)
+    AI_FUSED_ANALYSIS: bool = os.getenv("AI_FUSED_ANALYSIS", "1") == "1"
     
     @classmethod
     def ensure_folders(cls) -> None:
@@ -124,6 +162,19 @@ class Config:
         cls.ERRORS_FOLDER.mkdir(parents=True, exist_ok=True)
 
 
+# סדר החיפוש מחושב מראש כ-tuple של (שם מאגר, resource_id, סוג התראה, הודעת התראה)
+Config.GOV_SEARCH_RESOURCES = tuple(
+    (
+        Config.GOV_DATABASES[key]["name"],
+        Config.GOV_DATABASES[key]["resource_id"],
+        Config.GOV_DATABASES[key].get("alert_type"),
+        Config.GOV_DATABASES[key].get("alert_message"),
+    )
+    for key in Config.GOV_SEARCH_ORDER
+    if key in Config.GOV_DATABASES
+)
+
+
 # אובייקט קונפיגורציה גלובלי
 config = Config()
 
@@ -4,21 +4,72 @@
 """
 
 import aiosqlite
-import json
+import asyncio
 import logging
+import orjson
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from backend.config import config
-from backend.models import VehicleEvent, GovData, AIAnalysis, EventStatus, StatsResponse
+from backend.models import (
+    VehicleEvent, EventSummary, GovData, AIAnalysis, EventStatus, StatsResponse
+)
 
 logger = logging.getLogger("MoonGuard.Database")
 
+# שאילתות קבועות - sqlite3 שומר statements מוכנים לפי טקסט ה-SQL,
+# כך שטקסט זהה בכל קריאה מדלג על הידור מחדש
+_INSERT_EVENT_SQL = """
+    INSERT INTO events (
+        timestamp, display_time, display_date, location_id,
+        lpr, gov_data, ai_analysis, status, image_filename, image_path,
+        manufacturer, color, ai_found, ai_confidence
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_LAST_EVENT_ID_SQL = "SELECT last_insert_rowid()"
+
+_SELECT_EVENTS_SQL = "SELECT * FROM events ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+_SELECT_EVENTS_BY_STATUS_SQL = (
+    "SELECT * FROM events WHERE status = ? ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+)
+_SELECT_EVENT_BY_ID_SQL = "SELECT * FROM events WHERE id = ?"
+
+_SUMMARY_COLUMNS = """
+    id, timestamp, display_time, lpr, status, image_filename,
+    manufacturer, color, ai_found, ai_confidence
+"""
+_SELECT_SUMMARIES_SQL = (
+    f"SELECT {_SUMMARY_COLUMNS} FROM events ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+)
+_SELECT_SUMMARIES_BY_STATUS_SQL = (
+    f"SELECT {_SUMMARY_COLUMNS} FROM events WHERE status = ? "
+    "ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+)
+
+_SELECT_STATS_SQL = "SELECT status, n FROM stats_counters"
+
+_SELECT_CACHED_ANALYSIS_SQL = "SELECT analysis FROM ai_cache WHERE hash = ?"
+_SAVE_CACHED_ANALYSIS_SQL = "INSERT OR REPLACE INTO ai_cache (hash, analysis) VALUES (?, ?)"
+_PRUNE_AI_CACHE_SQL = "DELETE FROM ai_cache WHERE ts < datetime('now', '-7 days')"
+
+_DELETE_EVENT_SQL = "DELETE FROM events WHERE id = ?"
+_ALERT_STATUSES = ('ALERT', 'FAKE_PLATE', 'NO_LICENSE', 'OFF_ROAD')
+_DELETE_NON_ALERT_EVENTS_SQL = (
+    f"DELETE FROM events WHERE status NOT IN ({','.join('?' for _ in _ALERT_STATUSES)})"
+)
+
 
 class Database:
     """מחלקה לניהול בסיס הנתונים."""
     
+    # גודל מקסימלי וחלון זמן (שניות) לאצוות כתיבה
+    _BATCH_MAX_SIZE = 32
+    _BATCH_WINDOW = 0.05
+    # מרווח (שניות) בין ניקויים של רשומות ישנות ממטמון ה-AI
+    _CACHE_PRUNE_INTERVAL = 3600.0
+    
     def __init__(self, db_path: Path = config.DATABASE_PATH):
         """
         אתחול מחלקת בסיס הנתונים.
@@ -28,16 +79,36 @@ class Database:
         """
         self.db_path = db_path
         self._connection: Optional[aiosqlite.Connection] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # כל טרנזקציית כתיבה (execute עד commit) רצה בתוך המנעול, כך ש-commit
+        # או rollback של כותב אחד לא תופס עבודה חלקית של כותב אחר בחיבור המשותף
+        self._write_lock = asyncio.Lock()
+        self._cache_pruned_at = 0.0
     
     async def connect(self) -> None:
         """התחברות לבסיס הנתונים ויצירת טבלאות."""
         self._connection = await aiosqlite.connect(str(self.db_path))
         self._connection.row_factory = aiosqlite.Row
         await self._create_tables()
+        # _create_tables כבר ניקה את מטמון ה-AI
+        self._cache_pruned_at = asyncio.get_running_loop().time()
+        
+        # תור כתיבה באצוות
+        self._write_queue = asyncio.Queue()
+        self._flush_task = asyncio.create_task(self._flush_worker())
+        
         logger.info(f"מחובר לבסיס נתונים: {self.db_path}")
     
     async def disconnect(self) -> None:
         """ניתוק מבסיס הנתונים."""
+        if self._flush_task:
+            # המתנה לכתיבת אירועים שממתינים בתור
+            await self._write_queue.join()
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        
         if self._connection:
             await self._connection.close()
             self._connection = None
@@ -45,6 +116,14 @@ class Database:
     
     async def _create_tables(self) -> None:
         """יצירת טבלאות בסיס הנתונים."""
+        # WAL - קוראים לא חוסמים כותבים, ו-commit לא מחייב סנכרון מלא לדיסק
+        await self._connection.execute("PRAGMA journal_mode=WAL")
+        await self._connection.execute("PRAGMA synchronous=NORMAL")
+        await self._connection.execute("PRAGMA temp_store=MEMORY")
+        await self._connection.execute("PRAGMA mmap_size=268435456")
+        await self._connection.execute("PRAGMA cache_size=-65536")
+        await self._connection.execute("PRAGMA wal_autocheckpoint=1000")
+        
         await self._connection.execute("""
             CREATE TABLE IF NOT EXISTS events (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,42 +136,162 @@ class Database:
                 ai_analysis TEXT,
                 status TEXT,
                 image_filename TEXT,
-                image_path TEXT
+                image_path TEXT,
+                manufacturer TEXT,
+                color TEXT,
+                ai_found INTEGER,
+                ai_confidence INTEGER
             )
         """)
+        await self._migrate_event_columns()
         
         # אינדקסים לשיפור ביצועים
         await self._connection.execute("""
             CREATE INDEX IF NOT EXISTS idx_events_timestamp 
             ON events(timestamp DESC)
         """)
+        # אינדקס משולב - סינון לפי סטטוס ומיון לפי זמן מתוך האינדקס בלבד
         await self._connection.execute("""
-            CREATE INDEX IF NOT EXISTS idx_events_status 
-            ON events(status)
+            CREATE INDEX IF NOT EXISTS idx_events_status_ts 
+            ON events(status, timestamp DESC)
         """)
+        await self._connection.execute("DROP INDEX IF EXISTS idx_events_status")
         await self._connection.execute("""
             CREATE INDEX IF NOT EXISTS idx_events_lpr 
             ON events(lpr)
         """)
         
+        # מוני סטטיסטיקה לפי סטטוס - מתעדכנים בטריגרים בכל הוספה ומחיקה.
+        # הטבלה, הטריגרים והמילוי הראשוני נוצרים בטרנזקציה אחת
+        await self._create_stats_counters()
+        
+        # מטמון תוצאות ניתוח AI לפי hash של התמונה
+        await self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                hash TEXT PRIMARY KEY,
+                analysis TEXT,
+                ts DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await self._connection.execute(_PRUNE_AI_CACHE_SQL)
+        
+        await self._connection.commit()
+    
+    async def _create_stats_counters(self) -> None:
+        """
+        יצירת טבלת מוני הסטטיסטיקה והטריגרים שמעדכנים אותה.
+        
+        בבסיס נתונים קיים המונים ממולאים מטבלת events. הבדיקה, היצירה
+        והמילוי רצים בטרנזקציה אחת, כך שקריסה באמצע או שני תהליכים
+        שעולים יחד לא משאירים מונים שגויים.
+        """
+        async with self._immediate_transaction():
+            cursor = await self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+            )
+            if await cursor.fetchone() is not None:
+                return
+            
+            await self._connection.execute("""
+                CREATE TABLE stats_counters (
+                    status TEXT PRIMARY KEY,
+                    n INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            await self._connection.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_events_stats_insert
+                AFTER INSERT ON events
+                BEGIN
+                    INSERT INTO stats_counters (status, n) VALUES (NEW.status, 1)
+                    ON CONFLICT(status) DO UPDATE SET n = n + 1;
+                END
+            """)
+            await self._connection.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_events_stats_delete
+                AFTER DELETE ON events
+                BEGIN
+                    UPDATE stats_counters SET n = n - 1 WHERE status = OLD.status;
+                END
+            """)
+            
+            # מילוי ראשוני עבור בסיס נתונים קיים
+            await self._connection.execute("""
+                INSERT INTO stats_counters (status, n)
+                SELECT status, COUNT(*) FROM events GROUP BY status
+            """)
+    
+    @asynccontextmanager
+    async def _immediate_transaction(self) -> AsyncIterator[None]:
+        """
+        טרנזקציה מפורשת שתופסת את נעילת הכתיבה מיד (BEGIN IMMEDIATE).
+        
+        משמשת למיגרציות בהפעלה: שינוי המבנה והמילוי נשמרים יחד או לא
+        בכלל, ותהליך (worker) נוסף ממתין עד לסיומן במקום לבצע אותן שוב.
+        """
+        await self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            await self._connection.rollback()
+            raise
         await self._connection.commit()
     
+    async def _event_columns(self) -> set[str]:
+        """שמות העמודות הקיימות בטבלת events."""
+        cursor = await self._connection.execute("PRAGMA table_info(events)")
+        return {row["name"] for row in await cursor.fetchall()}
+    
+    async def _migrate_event_columns(self) -> None:
+        """
+        הוספת עמודות השדות השכיחים לטבלת events קיימת.
+        
+        העמודות ממולאות פעם אחת מתוך ה-JSON השמור, כך ששליפות שצריכות
+        רק יצרן, צבע ותוצאת AI לא מפרסרות JSON. ההוספה והמילוי רצים
+        בטרנזקציה אחת, כך שקריסה באמצע לא משאירה עמודות ריקות.
+        """
+        columns = {
+            "manufacturer": "TEXT",
+            "color": "TEXT",
+            "ai_found": "INTEGER",
+            "ai_confidence": "INTEGER",
+        }
+        if columns.keys() <= await self._event_columns():
+            return
+        
+        async with self._immediate_transaction():
+            # בדיקה חוזרת בתוך הטרנזקציה - תהליך אחר אולי כבר השלים את המיגרציה
+            existing = await self._event_columns()
+            missing = [name for name in columns if name not in existing]
+            if not missing:
+                return
+            
+            for name in missing:
+                await self._connection.execute(
+                    f"ALTER TABLE events ADD COLUMN {name} {columns[name]}"
+                )
+            
+            await self._connection.execute("""
+                UPDATE events SET
+                    manufacturer = json_extract(gov_data, '$.manufacturer'),
+                    color = json_extract(gov_data, '$.color'),
+                    ai_found = json_extract(ai_analysis, '$.target_found'),
+                    ai_confidence = json_extract(ai_analysis, '$.confidence')
+            """)
+        logger.info(f"נוספו עמודות לטבלת events: {', '.join(missing)}")
+    
     async def save_event(self, event: VehicleEvent) -> int:
         """
         שמירת אירוע חדש לבסיס הנתונים.
         
+        האירוע נכנס לתור הכתיבה ונשמר יחד עם אירועים נוספים באצווה אחת.
+        
         Args:
             event: אובייקט האירוע לשמירה
             
         Returns:
             מזהה האירוע שנשמר
         """
-        cursor = await self._connection.execute("""
-            INSERT INTO events (
-                timestamp, display_time, display_date, location_id,
-                lpr, gov_data, ai_analysis, status, image_filename, image_path
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        row = (
             event.timestamp.isoformat(),
             event.display_time,
             event.display_date,
@@ -102,14 +301,109 @@ class Database:
             event.ai_analysis.model_dump_json(),
             event.status.value,
             event.image_filename,
-            event.image_path
-        ))
-        await self._connection.commit()
+            event.image_path,
+            event.gov_data.manufacturer,
+            event.gov_data.color,
+            event.ai_analysis.target_found,
+            event.ai_analysis.confidence
+        )
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((row, future))
         
-        event_id = cursor.lastrowid
+        event_id = await future
         logger.info(f"אירוע נשמר: ID={event_id}, LPR={event.lpr}")
         return event_id
     
+    async def _flush_worker(self) -> None:
+        """
+        משימת רקע לכתיבת אירועים באצוות.
+        
+        אוספת עד _BATCH_MAX_SIZE אירועים או עד _BATCH_WINDOW שניות,
+        וכותבת אותם ב-executemany עם commit יחיד.
+        """
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._write_queue.get()]
+            deadline = loop.time() + self._BATCH_WINDOW
+            
+            while len(batch) < self._BATCH_MAX_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._write_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                async with self._write_lock:
+                    await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    async def _write_batch(self, batch: list[tuple[tuple, asyncio.Future]]) -> None:
+        """
+        כתיבת אצוות אירועים בטרנזקציה אחת (בתוך _write_lock).
+        
+        Args:
+            batch: זוגות של (שורה להוספה, future שמקבל את מזהה האירוע)
+        """
+        try:
+            await self._connection.executemany(
+                _INSERT_EVENT_SQL, [row for row, _ in batch]
+            )
+            # מזהה השורה האחרונה בחיבור הזה, לפני ה-commit; הטרנזקציה
+            # מחזיקה את נעילת הכתיבה, כך שמזהי האצווה רציפים
+            cursor = await self._connection.execute(_LAST_EVENT_ID_SQL)
+            last_id = (await cursor.fetchone())[0]
+            await self._connection.commit()
+            
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(last_id - (len(batch) - 1 - i))
+                    
+        except Exception as e:
+            logger.error(f"שגיאה בשמירת אצוות אירועים: {e}")
+            # ביטול שורות שנכתבו חלקית, כדי שה-commit הבא לא ישמור אותן.
+            # כל הכתיבות עוברות דרך _write_lock, לכן אין בטרנזקציה עבודה של אחרים
+            try:
+                await self._connection.rollback()
+            except Exception as rollback_error:
+                logger.error(f"שגיאה בביטול טרנזקציה: {rollback_error}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    @staticmethod
+    def _row_to_event(row: aiosqlite.Row) -> VehicleEvent:
+        """
+        המרת שורה מבסיס הנתונים לאובייקט אירוע.
+        
+        הנתונים בטבלה נכתבו על ידי המערכת עצמה, לכן שדות ה-JSON נבנים
+        ב-model_construct ללא ולידציה חוזרת.
+        
+        Args:
+            row: שורה מטבלת events
+            
+        Returns:
+            אובייקט האירוע
+        """
+        return VehicleEvent(
+            id=row["id"],
+            timestamp=datetime.fromisoformat(row["timestamp"]),
+            display_time=row["display_time"],
+            display_date=row["display_date"],
+            location_id=row["location_id"],
+            lpr=row["lpr"],
+            gov_data=GovData.model_construct(**orjson.loads(row["gov_data"])),
+            ai_analysis=AIAnalysis.model_construct(**orjson.loads(row["ai_analysis"])),
+            status=EventStatus(row["status"]),
+            image_filename=row["image_filename"],
+            image_path=row["image_path"]
+        )
+    
     async def get_events(
         self, 
         limit: int = 50, 
@@ -127,37 +421,86 @@ class Database:
         Returns:
             רשימת אירועים
         """
-        query = "SELECT * FROM events"
-        params = []
+        if status:
+            cursor = await self._connection.execute(
+                _SELECT_EVENTS_BY_STATUS_SQL, (status.value, limit, offset)
+            )
+        else:
+            cursor = await self._connection.execute(_SELECT_EVENTS_SQL, (limit, offset))
+        rows = await cursor.fetchall()
+        
+        return [self._row_to_event(row) for row in rows]
+    
+    async def iter_events(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: Optional[EventStatus] = None
+    ) -> AsyncIterator[VehicleEvent]:
+        """
+        שליפת אירועים כזרם - שורה אחרי שורה, בלי לבנות רשימה מלאה.
         
+        Args:
+            limit: מספר אירועים מקסימלי
+            offset: נקודת התחלה
+            status: סינון לפי סטטוס
+            
+        Yields:
+            אירועים מהחדש לישן
+        """
         if status:
-            query += " WHERE status = ?"
-            params.append(status.value)
+            sql, params = _SELECT_EVENTS_BY_STATUS_SQL, (status.value, limit, offset)
+        else:
+            sql, params = _SELECT_EVENTS_SQL, (limit, offset)
+        
+        async with self._connection.execute(sql, params) as cursor:
+            async for row in cursor:
+                yield self._row_to_event(row)
+    
+    async def get_events_summary(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: Optional[EventStatus] = None
+    ) -> list[EventSummary]:
+        """
+        שליפת תקצירי אירועים לתצוגת רשימה.
         
-        query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        שולף רק את העמודות הדרושות לרשימה, בלי פרסור נתוני המאגר וה-AI.
         
-        cursor = await self._connection.execute(query, params)
+        Args:
+            limit: מספר אירועים מקסימלי
+            offset: נקודת התחלה
+            status: סינון לפי סטטוס
+            
+        Returns:
+            רשימת תקצירי אירועים
+        """
+        if status:
+            cursor = await self._connection.execute(
+                _SELECT_SUMMARIES_BY_STATUS_SQL, (status.value, limit, offset)
+            )
+        else:
+            cursor = await self._connection.execute(
+                _SELECT_SUMMARIES_SQL, (limit, offset)
+            )
         rows = await cursor.fetchall()
         
-        events = []
-        for row in rows:
-            event = VehicleEvent(
+        return [
+            EventSummary(
                 id=row["id"],
                 timestamp=datetime.fromisoformat(row["timestamp"]),
                 display_time=row["display_time"],
-                display_date=row["display_date"],
-                location_id=row["location_id"],
                 lpr=row["lpr"],
-                gov_data=GovData.model_validate_json(row["gov_data"]),
-                ai_analysis=AIAnalysis.model_validate_json(row["ai_analysis"]),
                 status=EventStatus(row["status"]),
                 image_filename=row["image_filename"],
-                image_path=row["image_path"]
+                manufacturer=row["manufacturer"],
+                color=row["color"],
+                ai_found=bool(row["ai_found"]),
+                ai_confidence=row["ai_confidence"] or 0
             )
-            events.append(event)
-        
-        return events
+            for row in rows
+        ]
     
     async def get_event_by_id(self, event_id: int) -> Optional[VehicleEvent]:
         """
@@ -169,28 +512,13 @@ class Database:
         Returns:
             אובייקט האירוע או None
         """
-        cursor = await self._connection.execute(
-            "SELECT * FROM events WHERE id = ?",
-            (event_id,)
-        )
+        cursor = await self._connection.execute(_SELECT_EVENT_BY_ID_SQL, (event_id,))
         row = await cursor.fetchone()
         
         if not row:
             return None
         
-        return VehicleEvent(
-            id=row["id"],
-            timestamp=datetime.fromisoformat(row["timestamp"]),
-            display_time=row["display_time"],
-            display_date=row["display_date"],
-            location_id=row["location_id"],
-            lpr=row["lpr"],
-            gov_data=GovData.model_validate_json(row["gov_data"]),
-            ai_analysis=AIAnalysis.model_validate_json(row["ai_analysis"]),
-            status=EventStatus(row["status"]),
-            image_filename=row["image_filename"],
-            image_path=row["image_path"]
-        )
+        return self._row_to_event(row)
     
     async def get_stats(self) -> StatsResponse:
         """
@@ -199,21 +527,14 @@ class Database:
         Returns:
             אובייקט סטטיסטיקות
         """
-        cursor = await self._connection.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN status = 'VERIFIED' THEN 1 ELSE 0 END) as verified,
-                SUM(CASE WHEN status = 'ALERT' THEN 1 ELSE 0 END) as alerts,
-                SUM(CASE WHEN status = 'UNKNOWN' THEN 1 ELSE 0 END) as unknown
-            FROM events
-        """)
-        row = await cursor.fetchone()
+        cursor = await self._connection.execute(_SELECT_STATS_SQL)
+        counts = {row["status"]: row["n"] for row in await cursor.fetchall()}
         
         return StatsResponse(
-            total_events=row["total"] or 0,
-            verified_count=row["verified"] or 0,
-            alert_count=row["alerts"] or 0,
-            unknown_count=row["unknown"] or 0
+            total_events=sum(counts.values()),
+            verified_count=counts.get('VERIFIED', 0),
+            alert_count=counts.get('ALERT', 0),
+            unknown_count=counts.get('UNKNOWN', 0)
         )
     
     async def get_alerts(self, limit: int = 20) -> list[VehicleEvent]:
@@ -228,6 +549,49 @@ class Database:
         """
         return await self.get_events(limit=limit, status=EventStatus.ALERT)
     
+    async def get_cached_analysis(self, cache_key: str) -> Optional[dict]:
+        """
+        שליפת תוצאת ניתוח AI מהמטמון.
+        
+        Args:
+            cache_key: hash התמונה והנתונים
+            
+        Returns:
+            מילון תשובת המודל, או None אם לא נמצא
+        """
+        if not self._connection:
+            return None
+        
+        cursor = await self._connection.execute(
+            _SELECT_CACHED_ANALYSIS_SQL, (cache_key,)
+        )
+        row = await cursor.fetchone()
+        
+        return orjson.loads(row["analysis"]) if row else None
+    
+    async def save_cached_analysis(self, cache_key: str, analysis: dict) -> None:
+        """
+        שמירת תוצאת ניתוח AI במטמון.
+        
+        Args:
+            cache_key: hash התמונה והנתונים
+            analysis: מילון תשובת המודל
+        """
+        if not self._connection:
+            return
+        
+        async with self._write_lock:
+            await self._connection.execute(
+                _SAVE_CACHED_ANALYSIS_SQL,
+                (cache_key, orjson.dumps(analysis).decode())
+            )
+            # ניקוי רשומות ישנות גם בשרת שרץ זמן רב (לא רק בהתחברות)
+            now = asyncio.get_running_loop().time()
+            if now - self._cache_pruned_at > self._CACHE_PRUNE_INTERVAL:
+                await self._connection.execute(_PRUNE_AI_CACHE_SQL)
+                self._cache_pruned_at = now
+            await self._connection.commit()
+    
     async def delete_event(self, event_id: int) -> bool:
         """
         מחיקת אירוע מבסיס הנתונים.
@@ -238,11 +602,9 @@ class Database:
         Returns:
             True אם האירוע נמחק, False אם לא נמצא
         """
-        cursor = await self._connection.execute(
-            "DELETE FROM events WHERE id = ?",
-            (event_id,)
-        )
-        await self._connection.commit()
+        async with self._write_lock:
+            cursor = await self._connection.execute(_DELETE_EVENT_SQL, (event_id,))
+            await self._connection.commit()
         
         deleted = cursor.rowcount > 0
         if deleted:
@@ -259,14 +621,11 @@ class Database:
         Returns:
             מספר האירועים שנמחקו
         """
-        alert_statuses = ['ALERT', 'FAKE_PLATE', 'NO_LICENSE', 'OFF_ROAD']
-        placeholders = ','.join(['?' for _ in alert_statuses])
-        
-        cursor = await self._connection.execute(
-            f"DELETE FROM events WHERE status NOT IN ({placeholders})",
-            alert_statuses
-        )
-        await self._connection.commit()
+        async with self._write_lock:
+            cursor = await self._connection.execute(
+                _DELETE_NON_ALERT_EVENTS_SQL, _ALERT_STATUSES
+            )
+            await self._connection.commit()
         
         deleted_count = cursor.rowcount
         logger.info(f"נמחקו {deleted_count} אירועים שאינם התראות")
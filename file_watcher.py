@@ -6,25 +6,95 @@
 import asyncio
 import logging
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Callable, Optional
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileCreatedEvent
+from typing import TYPE_CHECKING, Callable, NamedTuple, Optional
+from watchdog.events import PatternMatchingEventHandler, FileCreatedEvent
+from watchdog.utils.patterns import match_any_paths
 
 from backend.config import config
 
+# ה-observers (בדיקת inotify / טעינת pywin32) נטענים רק בהפעלת ניטור
+if TYPE_CHECKING:
+    from watchdog.observers.api import BaseObserver
+
 logger = logging.getLogger("MoonGuard.Watcher")
 
+# מערכות קבצים ברשת - אירועי inotify / ReadDirectoryChangesW לא אמינים עליהן
+_NETWORK_FS_TYPES = frozenset({"nfs", "nfs4", "cifs", "smbfs", "smb3", "fuse.sshfs", "9p"})
+
+# סינון אירועים לפי שם הקובץ עוד ב-thread של watchdog (ללא תלות באותיות גדולות/קטנות)
+_WATCH_PATTERNS = [f"*{ext}" for ext in config.VALID_EXTENSIONS]
+# קבצים זמניים והורדות חלקיות שהכותב מוחק או משנה את שמם מיד
+_IGNORE_PATTERNS = ["*.tmp", "*.part", "*.crdownload", ".*"]
+
+# פורמט שם קובץ: <מיקום>_<ערוץ>_<YYYYMMDDhhmmss...>_<לוחית>_...
+# הלוחית נלכדת כמו שהיא (גם עם אותיות) - הסינון נעשה בעיבוד הקובץ
+_FILENAME_RE = re.compile(
+    r"(?P<loc1>[^_]+)_(?P<loc2>[^_]+)_"
+    r"(?P<date>(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2}))"
+    r"(?P<hour>\d{2})(?P<minute>\d{2})(?P<second>\d{2})[^_]*_(?P<lpr>[^_]*)"
+)
+
+
+def _is_network_path(folder: Path) -> bool:
+    """
+    בדיקה האם תיקייה נמצאת על כונן רשת (NFS / SMB).
+    
+    Args:
+        folder: נתיב התיקייה
+        
+    Returns:
+        True אם התיקייה על כונן רשת
+    """
+    resolved = str(folder.resolve())
+    
+    if os.name == "nt":
+        if resolved.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            drive_remote = 4
+            return ctypes.windll.kernel32.GetDriveTypeW(resolved[:3]) == drive_remote
+        except (AttributeError, OSError):
+            return False
+    
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    
+    # נקודת העיגון הארוכה ביותר שמכילה את התיקייה
+    best_point, best_type = "", ""
+    for point, fs_type in mounts:
+        point = re.sub(r"\\(\d{3})", lambda m: chr(int(m.group(1), 8)), point)
+        prefix = point.rstrip("/") + "/"
+        if (resolved == point or resolved.startswith(prefix)) and len(point) > len(best_point):
+            best_point, best_type = point, fs_type
+    
+    return best_type in _NETWORK_FS_TYPES
+
 
-class NewFileHandler(FileSystemEventHandler):
+class NewFileHandler(PatternMatchingEventHandler):
     """מטפל באירועי יצירת קבצים חדשים."""
     
+    # זמן המתנה מקסימלי (שניות) לסיום כתיבת קובץ
+    _STABLE_MAX_WAIT = 2.0
+    # לוג "קובץ חדש זוהה" מצטבר בזמן עומס: שורה אחת לכל היותר בשנייה / 100 קבצים
+    _LOG_FLUSH_INTERVAL = 1.0
+    _LOG_FLUSH_MAX = 100
+    
     def __init__(
         self,
         start_time: datetime,
-        callback: Callable[[Path], None],
-        loop: asyncio.AbstractEventLoop
+        callback: Callable[[Path, Optional["ParsedName"]], None],
+        loop: asyncio.AbstractEventLoop,
+        file_filter: Optional[Callable[[Path], Optional["ParsedName"]]] = None
     ):
         """
         אתחול המטפל.
@@ -33,12 +103,32 @@ class NewFileHandler(FileSystemEventHandler):
             start_time: זמן התחלת הניטור (מתעלם מקבצים ישנים יותר)
             callback: פונקציה לקריאה כשמזוהה קובץ חדש
             loop: לולאת האירועים של asyncio
+            file_filter: סינון מהיר (סינכרוני) לפני תזמון ה-callback (אופציונלי);
+                מחזיר את פרטי שם הקובץ שיועברו ל-callback, או None לדילוג
         """
-        super().__init__()
+        super().__init__(
+            patterns=_WATCH_PATTERNS,
+            ignore_patterns=_IGNORE_PATTERNS,
+            ignore_directories=True,
+            case_sensitive=False
+        )
         self.start_time = start_time
+        self._start_ts = start_time.timestamp()
         self.callback = callback
         self.loop = loop
-        self.processed_files: set[str] = set()
+        self.file_filter = file_filter
+        # קבצים שכבר זוהו - מוגבל לחלון של הקבצים האחרונים (LRU)
+        self.processed_files: OrderedDict[str, None] = OrderedDict()
+        self._max_processed = config.PROCESSED_CACHE_SIZE
+        # on_created רץ ב-thread של watchdog, הסריקה הראשונית ב-thread משלה
+        self._lock = threading.Lock()
+        # שמות קבצים שזוהו וטרם נכתבו ללוג
+        self._info_buf: list[str] = []
+        self._last_flush = 0.0
+        # הפניות למשימות פעילות, כדי שלא ייאספו לפני סיומן
+        self._tasks: set[asyncio.Task] = set()
+        # מספר מקסימלי של קבצים שנמצאים בעיבוד (callback) במקביל
+        self._sem = asyncio.Semaphore(config.MAX_CONCURRENT_CALLBACKS)
     
     def on_created(self, event: FileCreatedEvent) -> None:
         """
@@ -47,51 +137,160 @@ class NewFileHandler(FileSystemEventHandler):
         Args:
             event: אירוע יצירת הקובץ
         """
-        if event.is_directory:
-            return
-        
-        file_path = Path(event.src_path)
+        self.submit(event.src_path)
+    
+    def matches(self, path: str) -> bool:
+        """
+        בדיקה אם שם הקובץ עובר את סינון התבניות של המטפל.
         
-        # בדיקת סיומת קובץ
-        if file_path.suffix.lower() not in config.VALID_EXTENSIONS:
-            return
+        Args:
+            path: נתיב הקובץ
+            
+        Returns:
+            True אם הקובץ רלוונטי לעיבוד
+        """
+        return match_any_paths(
+            [path],
+            included_patterns=self.patterns,
+            excluded_patterns=self.ignore_patterns,
+            case_sensitive=self.case_sensitive
+        )
+    
+    def submit(self, src: str, entry: Optional[os.DirEntry] = None) -> None:
+        """
+        בדיקת קובץ ותזמון עיבודו אם הוא חדש.
+        הקובץ כבר עבר את סינון התבניות (ב-dispatch או בסריקה).
         
+        Args:
+            src: נתיב הקובץ
+            entry: רשומת os.scandir של הקובץ (אופציונלי, חוסך stat נפרד)
+        """
         # מניעת עיבוד כפול
-        if str(file_path) in self.processed_files:
+        if src in self.processed_files:
             return
         
-        # בדיקת זמן יצירת הקובץ
+        # בדיקת זמן יצירת הקובץ (קריאת stat אחת, השוואת timestamps)
         try:
-            file_stat = file_path.stat()
-            file_ctime = datetime.fromtimestamp(file_stat.st_ctime)
-            
-            if file_ctime < self.start_time:
-                logger.debug(f"מתעלם מקובץ ישן: {file_path.name}")
+            file_stat = entry.stat() if entry else os.stat(src)
+            if file_stat.st_ctime < self._start_ts:
+                # המרה ל-datetime רק כשלוג debug פעיל
+                if logger.isEnabledFor(logging.DEBUG):
+                    created = datetime.fromtimestamp(file_stat.st_ctime)
+                    logger.debug(
+                        f"מתעלם מקובץ ישן: {os.path.basename(src)} "
+                        f"(נוצר {created:%H:%M:%S}, לפני {self.start_time:%H:%M:%S})"
+                    )
                 return
             
         except OSError as e:
             logger.error(f"שגיאה בקריאת מידע על קובץ: {e}")
             return
         
-        self.processed_files.add(str(file_path))
-        logger.info(f"קובץ חדש זוהה: {file_path.name}")
+        with self._lock:
+            if src in self.processed_files:
+                return
+            self.processed_files[src] = None
+            if len(self.processed_files) > self._max_processed:
+                self.processed_files.popitem(last=False)
+        file_path = Path(src)
+        
+        # קבצים שנדחים כבר כאן לא יוצרים משימה בלולאת האירועים
+        meta = None
+        if self.file_filter is not None:
+            meta = self.file_filter(file_path)
+            if meta is None:
+                return
+        
+        self._log_detected(file_path.name)
+        
+        # תזמון ה-callback בלולאת האירועים (ללא Future בין threads)
+        try:
+            self.loop.call_soon_threadsafe(self._spawn, file_path, meta)
+        except RuntimeError:
+            logger.warning(f"לולאת האירועים סגורה, מדלג על קובץ: {file_path.name}")
+    
+    def _log_detected(self, name: str) -> None:
+        """
+        רישום קובץ שזוהה ללוג המצטבר.
         
-        # קריאה ל-callback באופן אסינכרוני
-        asyncio.run_coroutine_threadsafe(
-            self._delayed_callback(file_path),
-            self.loop
+        קובץ בודד נכתב מיד; בזמן עומס השמות נאספים ונכתבים בשורה אחת.
+        
+        Args:
+            name: שם הקובץ
+        """
+        with self._lock:
+            self._info_buf.append(name)
+            due = (
+                time.monotonic() - self._last_flush > self._LOG_FLUSH_INTERVAL
+                or len(self._info_buf) >= self._LOG_FLUSH_MAX
+            )
+            first_pending = len(self._info_buf) == 1
+        
+        if due:
+            self._flush_detected()
+        elif first_pending:
+            # כתיבת השמות שנותרו בסוף העומס
+            try:
+                self.loop.call_soon_threadsafe(
+                    self.loop.call_later, self._LOG_FLUSH_INTERVAL, self._flush_detected
+                )
+            except RuntimeError:
+                pass
+    
+    def _flush_detected(self) -> None:
+        """כתיבת הקבצים שנאספו ללוג בשורה אחת."""
+        with self._lock:
+            names, self._info_buf = self._info_buf, []
+            self._last_flush = time.monotonic()
+        
+        if len(names) == 1:
+            logger.info(f"קובץ חדש זוהה: {names[0]}")
+        elif names:
+            logger.info(f"זוהו {len(names)} קבצים חדשים: {', '.join(names)}")
+    
+    def _spawn(self, file_path: Path, meta: Optional["ParsedName"]) -> None:
+        """
+        יצירת משימת עיבוד לקובץ (רץ בתוך לולאת האירועים).
+        
+        Args:
+            file_path: נתיב הקובץ
+            meta: פרטי שם הקובץ מהסינון המהיר (None אם אין סינון)
+        """
+        task = self.loop.create_task(
+            self._delayed_callback(file_path, meta), name=f"watch:{file_path.name}"
         )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
     
-    async def _delayed_callback(self, file_path: Path) -> None:
+    async def _delayed_callback(self, file_path: Path, meta: Optional["ParsedName"]) -> None:
         """
-        קריאה מושהית ל-callback לוודא שהקובץ נכתב במלואו.
+        קריאה מושהית ל-callback לאחר שהקובץ נכתב במלואו.
+        
+        גודל הקובץ נבדק שוב ושוב עד שאינו משתנה בין שתי בדיקות
+        (ולכל היותר _STABLE_MAX_WAIT שניות). ה-callback עצמו מוגבל
+        ל-MAX_CONCURRENT_CALLBACKS קבצים במקביל.
         
         Args:
             file_path: נתיב הקובץ
+            meta: פרטי שם הקובץ מהסינון המהיר (None אם אין סינון)
         """
-        # המתנה קצרה לוודא שהקובץ נכתב במלואו
-        await asyncio.sleep(0.5)
-        await self.callback(file_path)
+        interval = config.FILE_STABLE_POLL_INTERVAL
+        prev_size = -1
+        
+        for _ in range(max(1, int(self._STABLE_MAX_WAIT / interval))):
+            try:
+                size = (await asyncio.to_thread(os.stat, file_path)).st_size
+            except OSError as e:
+                logger.warning(f"קובץ לא זמין לעיבוד: {file_path.name} ({e})")
+                return
+            
+            if size == prev_size and size > 0:
+                break
+            prev_size = size
+            await asyncio.sleep(interval)
+        
+        async with self._sem:
+            await self.callback(file_path, meta)
 
 
 class DynamicWatcher:
@@ -99,12 +298,15 @@ class DynamicWatcher:
     
     def __init__(self):
         """אתחול המנהל."""
-        self._observer: Optional[Observer] = None
+        self._observer: Optional["BaseObserver"] = None
         self._watched_folder: Optional[Path] = None
         self._start_time: Optional[datetime] = None
         self._files_processed: int = 0
         self._callback: Optional[Callable] = None
+        self._filter: Optional[Callable[[Path], Optional["ParsedName"]]] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # תמונת מצב של get_status - נבנית מחדש רק אחרי שינוי
+        self._status_snapshot: Optional[dict] = None
     
     @property
     def is_active(self) -> bool:
@@ -129,16 +331,28 @@ class DynamicWatcher:
     def increment_processed(self) -> None:
         """מגדיל את מונה הקבצים המעובדים."""
         self._files_processed += 1
+        self._status_snapshot = None
     
-    def set_callback(self, callback: Callable[[Path], None]) -> None:
+    def set_callback(self, callback: Callable[[Path, Optional["ParsedName"]], None]) -> None:
         """
         הגדרת פונקציית callback לעיבוד קבצים.
         
         Args:
-            callback: פונקציה אסינכרונית שתיקרא עבור כל קובץ חדש
+            callback: פונקציה אסינכרונית שתיקרא עבור כל קובץ חדש, עם פרטי
+                שם הקובץ מהסינון המהיר (או None אם לא הוגדר סינון)
         """
         self._callback = callback
     
+    def set_filter(self, file_filter: Callable[[Path], Optional["ParsedName"]]) -> None:
+        """
+        הגדרת סינון מהיר לקבצים חדשים, לפני תזמון ה-callback.
+        
+        Args:
+            file_filter: פונקציה סינכרונית שמחזירה את פרטי שם הקובץ אם יש
+                לעבד אותו (הם מועברים ל-callback), או None לדילוג
+        """
+        self._filter = file_filter
+    
     def set_loop(self, loop: asyncio.AbstractEventLoop) -> None:
         """
         הגדרת לולאת אירועים.
@@ -177,6 +391,7 @@ class DynamicWatcher:
         
         try:
             # שמירת זמן ההתחלה
+            self._status_snapshot = None
             self._start_time = datetime.now()
             self._watched_folder = folder
             self._files_processed = 0
@@ -185,13 +400,33 @@ class DynamicWatcher:
             handler = NewFileHandler(
                 start_time=self._start_time,
                 callback=self._callback,
-                loop=self._loop
+                loop=self._loop,
+                file_filter=self._filter
             )
             
-            self._observer = Observer()
+            # כונני רשת לא מדווחים על קבצים חדשים באופן אמין - סריקה תקופתית
+            if config.FORCE_POLLING or _is_network_path(folder):
+                from watchdog.observers.polling import PollingObserver
+                self._observer = PollingObserver(timeout=config.WATCH_POLL_INTERVAL)
+                logger.info(
+                    f"ניטור בשיטת polling (כל {config.WATCH_POLL_INTERVAL} שניות): {folder}"
+                )
+            else:
+                from watchdog.observers import Observer
+                self._observer = Observer()
             self._observer.schedule(handler, str(folder), recursive=False)
             self._observer.start()
             
+            # קבצים שנוצרו בין שמירת זמן ההתחלה להפעלת ה-observer.
+            # הסריקה (stat, סינון ומחיקה לכל קובץ) רצה ב-thread נפרד כדי לא
+            # לעכב את לולאת האירועים בתיקייה גדולה או בכונן רשת
+            threading.Thread(
+                target=self._initial_scan,
+                args=(handler, folder, self._observer),
+                name="watch-initial-scan",
+                daemon=True
+            ).start()
+            
             logger.info(f"התחיל ניטור תיקייה: {folder}")
             return True, f"מנטר תיקייה: {folder}"
             
@@ -199,6 +434,26 @@ class DynamicWatcher:
             logger.error(f"שגיאה בהפעלת ניטור: {e}")
             return False, f"שגיאה: {str(e)}"
     
+    @staticmethod
+    def _initial_scan(handler: NewFileHandler, folder: Path, observer: "BaseObserver") -> None:
+        """
+        סריקה חד-פעמית של התיקייה אחרי הפעלת ה-observer.
+        
+        Args:
+            handler: המטפל שאליו מוגשים הקבצים
+            folder: התיקייה הנסרקת
+            observer: ה-observer של הניטור - הסריקה נעצרת אם הניטור הופסק
+        """
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if not observer.is_alive():
+                        return
+                    if entry.is_file(follow_symlinks=False) and handler.matches(entry.path):
+                        handler.submit(entry.path, entry)
+        except OSError as e:
+            logger.error(f"שגיאה בסריקת התיקייה: {e}")
+    
     def stop(self) -> tuple[bool, str]:
         """
         עצירת הניטור.
@@ -217,6 +472,7 @@ class DynamicWatcher:
             old_folder = self._watched_folder
             self._watched_folder = None
             self._start_time = None
+            self._status_snapshot = None
             
             logger.info(f"הניטור הופסק: {old_folder}")
             return True, "הניטור הופסק בהצלחה"
@@ -229,18 +485,40 @@ class DynamicWatcher:
         """
         קבלת סטטוס הניטור.
         
+        המילון נשמר ומוחזר שוב עד לשינוי במצב הניטור או במונה הקבצים,
+        ואין לשנות אותו.
+        
         Returns:
-            מילון עם פרטי הסטטוס
+            מילון עם פרטי הסטטוס (מוכן לקידוד JSON)
         """
-        return {
-            "is_active": self.is_active,
-            "watched_folder": self.watched_folder,
-            "started_at": self._start_time.isoformat() if self._start_time else None,
-            "files_processed": self._files_processed
-        }
+        snapshot = self._status_snapshot
+        # בנייה מחדש גם אם ה-observer נעצר שלא דרך stop()
+        if snapshot is None or (snapshot["is_active"] and not self.is_active):
+            snapshot = self._status_snapshot = {
+                "is_active": self.is_active,
+                "watched_folder": self.watched_folder,
+                "started_at": self._start_time.isoformat() if self._start_time else None,
+                "files_processed": self._files_processed
+            }
+        return snapshot
 
 
-def parse_filename(filename: str) -> dict:
+class ParsedName(NamedTuple):
+    """המידע המחולץ משם קובץ תמונה."""
+    valid: bool
+    location_id: str = ""
+    raw_date: str = ""
+    display_time: str = ""
+    display_date: str = ""
+    lpr: str = ""
+    error: Optional[str] = None
+
+
+# תוצאה קבועה לשם קובץ שאינו בפורמט (ללא הקצאה לכל קובץ)
+_INVALID_NAME = ParsedName(valid=False, error="פורמט שם קובץ לא תקין")
+
+
+def parse_filename(filename: str) -> ParsedName:
     """
     פרסור שם קובץ לחילוץ מידע.
     
@@ -250,45 +528,27 @@ def parse_filename(filename: str) -> dict:
         filename: שם הקובץ
         
     Returns:
-        מילון עם המידע המחולץ
+        ParsedName עם המידע המחולץ
     """
     try:
-        base_name = Path(filename).stem
-        parts = base_name.split("_")
-        
-        if len(parts) < 4:
-            return {"valid": False, "error": "פורמט שם קובץ לא תקין"}
+        match = _FILENAME_RE.match(os.path.splitext(filename)[0])
+        if not match:
+            return _INVALID_NAME
         
-        # חילוץ מיקום
-        location_id = f"{parts[0]}_{parts[1]}"
+        loc1, loc2, date_str, year, month, day, hour, minute, second, lpr = match.groups()
         
-        # חילוץ זמן
-        timestamp_full = parts[2]
-        if len(timestamp_full) < 14:
-            return {"valid": False, "error": "פורמט זמן לא תקין"}
-        
-        date_str = timestamp_full[:8]
-        time_str = timestamp_full[8:14]
-        
-        # פורמט תצוגה
-        formatted_time = f"{time_str[:2]}:{time_str[2:4]}:{time_str[4:]}"
-        formatted_date = f"{date_str[6:]}/{date_str[4:6]}/{date_str[:4]}"
-        
-        # לוחית רישוי
-        lpr = parts[3]
-        
-        return {
-            "valid": True,
-            "location_id": location_id,
-            "raw_date": date_str,
-            "display_time": formatted_time,
-            "display_date": formatted_date,
-            "lpr": lpr
-        }
+        return ParsedName(
+            valid=True,
+            location_id=f"{loc1}_{loc2}",
+            raw_date=date_str,
+            display_time=f"{hour}:{minute}:{second}",
+            display_date=f"{day}/{month}/{year}",
+            lpr=lpr
+        )
         
     except Exception as e:
         logger.error(f"שגיאה בפרסור שם קובץ: {e}")
-        return {"valid": False, "error": str(e)}
+        return ParsedName(valid=False, error=str(e))
 
 
 # אובייקט watcher גלובלי
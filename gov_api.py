@@ -4,8 +4,12 @@
 בודק במספר מאגרים לפי סדר עדיפות.
 """
 
+import asyncio
 import logging
+import re
 import httpx
+import orjson
+from cachetools import TLRUCache
 from typing import Optional, Tuple
 
 from backend.config import config
@@ -13,6 +17,45 @@ from backend.models import GovData
 
 logger = logging.getLogger("MoonGuard.GovAPI")
 
+# שמות השדות האפשריים לכל נתון, לפי סדר עדיפות - שמות שונים במאגרים שונים
+_MFG_KEYS = ("tozeret_nm", "tozeret_cd", "tozeret")
+_MODEL_KEYS = ("kinuy_mishari", "degem_nm", "degem_cd")
+_COLOR_KEYS = ("tzeva_rechev", "tzeva_cd")
+_YEAR_KEYS = ("shnat_yitzur", "shnat_yitsur")
+_UNKNOWN = "לא ידוע"
+
+# לוחית תקינה - ספרות בלבד באחד מהאורכים המותרים (למשל \d{7}|\d{8})
+_LPR_RE = re.compile(
+    "|".join(rf"\d{{{n}}}" for n in sorted(config.LPR_VALID_LENGTHS))
+)
+
+# לקוח HTTP משותף לכל החיפושים - חיבורי TLS ל-data.gov.il נשמרים בין בקשות.
+# ניסיון חוזר אחד על כישלון התחברות (לא על תשובות שגיאה)
+_http_client = httpx.AsyncClient(
+    timeout=config.GOV_API_TIMEOUT,
+    transport=httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        retries=1
+    )
+)
+
+
+def _gov_cache_ttu(_lpr: str, result: GovData, now: float) -> float:
+    """זמן תפוגה לרשומה במטמון - קצר לתוצאה שלילית (לא נמצא / שגיאה)."""
+    ttl = config.GOV_CACHE_TTL if result.found else config.GOV_NEGATIVE_CACHE_TTL
+    return now + ttl
+
+
+# מטמון תוצאות לפי לוחית, ובקשות שכבר בדרך (לאיחוד בקשות מקבילות לאותה לוחית)
+_gov_cache: TLRUCache = TLRUCache(maxsize=config.GOV_CACHE_SIZE, ttu=_gov_cache_ttu)
+_inflight: dict[str, asyncio.Task] = {}
+
+
+async def close_gov_client() -> None:
+    """סגירת לקוח ה-HTTP המשותף (בעת כיבוי השרת)."""
+    await _http_client.aclose()
+
 
 async def search_single_database(
     client: httpx.AsyncClient,
@@ -41,7 +84,7 @@ async def search_single_database(
     try:
         response = await client.get(config.GOV_API_URL, params=params)
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if data.get("success") and data.get("result", {}).get("records"):
             record = data["result"]["records"][0]
@@ -55,50 +98,62 @@ async def search_single_database(
         return False, None
 
 
-def extract_vehicle_data(record: dict) -> dict:
+async def _search_sequential(lpr: str) -> Optional[Tuple[tuple, dict]]:
     """
-    חילוץ נתוני רכב מרשומה.
-    שמות השדות יכולים להשתנות בין מאגרים.
+    חיפוש במאגרים אחד אחרי השני לפי סדר העדיפות.
     
     Args:
-        record: רשומה מה-API
+        lpr: מספר לוחית הרישוי
         
     Returns:
-        מילון עם נתוני הרכב
+        tuple של (פרטי המאגר, רשומה) עבור המאגר הראשון שבו נמצא, או None
     """
-    # ניסיון לחלץ נתונים - שמות שדות שונים במאגרים שונים
-    manufacturer = (
-        record.get("tozeret_nm") or
-        record.get("tozeret_cd") or
-        record.get("tozeret") or
-        "לא ידוע"
-    )
+    for resource in config.GOV_SEARCH_RESOURCES:
+        found, record = await search_single_database(
+            client=_http_client,
+            lpr=lpr,
+            resource_id=resource[1],
+            db_name=resource[0]
+        )
+        if found and record:
+            return resource, record
     
-    model = (
-        record.get("kinuy_mishari") or
-        record.get("degem_nm") or
-        record.get("degem_cd") or
-        "לא ידוע"
-    )
+    return None
+
+
+async def _search_parallel(lpr: str) -> Optional[Tuple[tuple, dict]]:
+    """
+    חיפוש בכל המאגרים במקביל, עם שמירה על סדר העדיפות.
     
-    color = (
-        record.get("tzeva_rechev") or
-        record.get("tzeva_cd") or
-        "לא ידוע"
-    )
+    כל הבקשות יוצאות יחד; התוצאות נבדקות לפי הסדר, כך שממצא מתקבל
+    ברגע שכל המאגרים בעדיפות גבוהה יותר החזירו "לא נמצא".
+    שאר הבקשות מבוטלות.
     
-    year = str(
-        record.get("shnat_yitzur") or
-        record.get("shnat_yitsur") or
-        "לא ידוע"
-    )
+    Args:
+        lpr: מספר לוחית הרישוי
+        
+    Returns:
+        tuple של (פרטי המאגר, רשומה) עבור המאגר הראשון שבו נמצא, או None
+    """
+    tasks = [
+        asyncio.create_task(search_single_database(
+            client=_http_client,
+            lpr=lpr,
+            resource_id=resource_id,
+            db_name=db_name
+        ))
+        for db_name, resource_id, _, _ in config.GOV_SEARCH_RESOURCES
+    ]
     
-    return {
-        "manufacturer": manufacturer,
-        "model": model,
-        "color": color,
-        "year": year
-    }
+    try:
+        for resource, task in zip(config.GOV_SEARCH_RESOURCES, tasks):
+            found, record = await task
+            if found and record:
+                return resource, record
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 async def search_all_databases(lpr: str) -> GovData:
@@ -112,74 +167,96 @@ async def search_all_databases(lpr: str) -> GovData:
     4. מאגרים נוספים (ציבורי, דו גלגלי, כבד)
     5. אם לא נמצא בכלל -> לוחית מזויפת
     
+    כש-GOV_PARALLEL מופעל הבקשות נשלחות במקביל, וסדר העדיפות נשמר.
+    
     Args:
         lpr: מספר לוחית הרישוי
         
     Returns:
         אובייקט GovData עם כל המידע
     """
-    async with httpx.AsyncClient(timeout=config.GOV_API_TIMEOUT) as client:
-        
-        # עוברים על כל המאגרים לפי הסדר
-        for db_key in config.GOV_SEARCH_ORDER:
-            db_info = config.GOV_DATABASES.get(db_key)
-            if not db_info:
-                continue
-            
-            found, record = await search_single_database(
-                client=client,
-                lpr=lpr,
-                resource_id=db_info["resource_id"],
-                db_name=db_info["name"]
-            )
-            
-            if found and record:
-                # חילוץ נתוני הרכב
-                vehicle_data = extract_vehicle_data(record)
-                
-                # בניית התגובה
-                gov_data = GovData(
-                    found=True,
-                    manufacturer=vehicle_data["manufacturer"],
-                    model=vehicle_data["model"],
-                    color=vehicle_data["color"],
-                    year=vehicle_data["year"],
-                    source_db=db_info["name"],
-                    alert_type=db_info.get("alert_type"),
-                    alert_message=db_info.get("alert_message")
-                )
-                
-                # לוג מפורט
-                if db_info.get("alert_type"):
-                    logger.warning(
-                        f"⚠️ רכב {lpr} נמצא במאגר בעייתי: "
-                        f"{db_info['name']} - {db_info.get('alert_message')}"
-                    )
-                else:
-                    logger.info(
-                        f"✓ רכב {lpr}: {gov_data.manufacturer} {gov_data.model} "
-                        f"({gov_data.color}) - מאגר: {db_info['name']}"
-                    )
-                
-                return gov_data
-        
-        # לא נמצא באף מאגר - לוחית מזויפת!
-        logger.error(f"🔴 לוחית מזויפת! {lpr} לא נמצא באף מאגר ממשלתי")
-        
-        return GovData(
-            found=False,
-            alert_type="FAKE_PLATE",
-            alert_message="לוחית מזויפת - לא נמצא באף מאגר ממשלתי"
+    if config.GOV_PARALLEL:
+        hit = await _search_parallel(lpr)
+    else:
+        hit = await _search_sequential(lpr)
+    
+    if hit:
+        (db_name, _, alert_type, alert_message), record = hit
+        
+        # בניית התגובה - הערך הראשון שקיים בין שמות השדות האפשריים
+        gov_data = GovData(
+            found=True,
+            manufacturer=next((record[k] for k in _MFG_KEYS if record.get(k)), _UNKNOWN),
+            model=next((record[k] for k in _MODEL_KEYS if record.get(k)), _UNKNOWN),
+            color=next((record[k] for k in _COLOR_KEYS if record.get(k)), _UNKNOWN),
+            year=str(next((record[k] for k in _YEAR_KEYS if record.get(k)), _UNKNOWN)),
+            source_db=db_name,
+            alert_type=alert_type,
+            alert_message=alert_message
         )
+        
+        # לוג מפורט
+        if alert_type:
+            logger.warning(
+                f"⚠️ רכב {lpr} נמצא במאגר בעייתי: "
+                f"{db_name} - {alert_message}"
+            )
+        else:
+            logger.info(
+                f"✓ רכב {lpr}: {gov_data.manufacturer} {gov_data.model} "
+                f"({gov_data.color}) - מאגר: {db_name}"
+            )
+        
+        return gov_data
+    
+    # לא נמצא באף מאגר - לוחית מזויפת!
+    logger.error(f"🔴 לוחית מזויפת! {lpr} לא נמצא באף מאגר ממשלתי")
+    
+    return GovData(
+        found=False,
+        alert_type="FAKE_PLATE",
+        alert_message="לוחית מזויפת - לא נמצא באף מאגר ממשלתי"
+    )
 
 
 async def get_vehicle_data(lpr: str) -> GovData:
     """
     שליפת נתוני רכב מכל המאגרים הממשלתיים.
     
+    רכב שנמצא נשמר במטמון ל-GOV_CACHE_TTL שניות. "לא נמצא" ושגיאות נשמרים
+    רק ל-GOV_NEGATIVE_CACHE_TTL שניות, כי החיפוש אינו מבדיל בין לוחית
+    מזויפת לתקלת רשת.
+    בקשות מקבילות לאותה לוחית ממתינות לאותו חיפוש.
+    
     Args:
         lpr: מספר לוחית הרישוי (7-8 ספרות)
         
+    Returns:
+        אובייקט GovData עם פרטי הרכב
+    """
+    cached = _gov_cache.get(lpr)
+    if cached is not None:
+        logger.info(f"נתוני רכב מהמטמון: {lpr}")
+        return cached
+    
+    task = _inflight.get(lpr)
+    if task is None:
+        task = asyncio.create_task(_fetch_vehicle_data(lpr))
+        _inflight[lpr] = task
+        task.add_done_callback(lambda _: _inflight.pop(lpr, None))
+    
+    result = await asyncio.shield(task)
+    _gov_cache[lpr] = result
+    return result
+
+
+async def _fetch_vehicle_data(lpr: str) -> GovData:
+    """
+    חיפוש נתוני רכב במאגרים עם טיפול בשגיאות.
+    
+    Args:
+        lpr: מספר לוחית הרישוי
+        
     Returns:
         אובייקט GovData עם פרטי הרכב
     """
@@ -209,13 +286,4 @@ def validate_lpr(lpr: str) -> bool:
     Returns:
         True אם תקין, False אחרת
     """
-    if not lpr:
-        return False
-    
-    if not lpr.isdigit():
-        return False
-    
-    if len(lpr) not in config.LPR_VALID_LENGTHS:
-        return False
-    
-    return True
+    return bool(lpr) and _LPR_RE.fullmatch(lpr) is not None
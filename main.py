@@ -5,16 +5,22 @@ FastAPI עם WebSocket לעדכונים בזמן אמת.
 
 import asyncio
 import logging
+import os
+import shutil
 import sys
-from contextlib import asynccontextmanager
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 from pathlib import Path
-from typing import Set
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+import orjson
 import uvicorn
 
 # הוספת הנתיב הראשי ל-path
@@ -25,12 +31,15 @@ from backend.database import db
 from backend.models import (
     VehicleEvent, EventStatus, WatcherStatus,
     WatchStartRequest, WatchStartResponse,
-    EventsResponse, StatsResponse, WebSocketMessage,
+    EventsResponse, EventSummaryResponse, StatsResponse, WebSocketMessage,
     GovData, AIAnalysis
 )
-from backend.file_watcher import watcher, parse_filename
-from backend.gov_api import get_vehicle_data, validate_lpr
-from backend.ai_analyzer import analyze_vehicle_image, detect_yellow_plate, pre_screen_image
+from backend.file_watcher import watcher, parse_filename, ParsedName
+from backend.gov_api import get_vehicle_data, validate_lpr, close_gov_client
+from backend.ai_analyzer import (
+    analyze_vehicle_full, analyze_vehicle_image, detect_yellow_plate,
+    pre_screen_image, encode_image_to_base64, close_ai_client
+)
 
 # הגדרת לוגים
 logging.basicConfig(
@@ -43,98 +52,603 @@ logger = logging.getLogger("MoonGuard")
 
 # ניהול חיבורי WebSocket
 class ConnectionManager:
-    """מנהל חיבורי WebSocket פעילים."""
+    """
+    מנהל חיבורי WebSocket פעילים.
+    
+    לכל לקוח תור הודעות ומשימת כתיבה משלו, כך שלקוח איטי לא מעכב
+    את השאר ושידור הוא הכנסה לתורים בלבד. הודעה מקודדת ל-JSON פעם
+    אחת (orjson) ואותה מחרוזת נשלחת לכל הלקוחות.
+    
+    כאשר מוגדר REDIS_URL, שידורים עוברים דרך ערוץ Redis וכל תהליך
+    (worker) מעביר אותם ללקוחות המחוברים אליו.
+    """
+    
+    # מספר מקסימלי של הודעות ממתינות ללקוח (הישנות נזרקות כשהתור מלא)
+    _QUEUE_SIZE = 256
+    # ערוץ Redis לשידור בין תהליכים
+    _CHANNEL = "moonguard:events"
     
     def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+        self.active_connections: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+        self._redis = None
+        self._sub_task: Optional[asyncio.Task] = None
+    
+    @property
+    def has_backplane(self) -> bool:
+        """האם השידור עובר דרך Redis (כמה תהליכים)."""
+        return self._redis is not None
+    
+    async def start_backplane(self, url: str) -> None:
+        """
+        חיבור לערוץ Redis לשידור בין תהליכים.
+        
+        Args:
+            url: כתובת Redis (למשל redis://localhost:6379/0)
+        """
+        # תלות אופציונלית - נטענת רק כשמוגדר REDIS_URL
+        import redis.asyncio as aioredis
+        
+        self._redis = aioredis.from_url(url)
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self._CHANNEL)
+        self._sub_task = asyncio.create_task(self._subscribe_loop(pubsub))
+        logger.info(f"שידור WebSocket דרך Redis: {self._CHANNEL}")
+    
+    async def stop_backplane(self) -> None:
+        """ניתוק מ-Redis."""
+        if self._sub_task:
+            # המתנה לסיום המשימה (ניתוק ה-pubsub) לפני סגירת החיבור
+            self._sub_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._sub_task
+            self._sub_task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+    
+    async def _subscribe_loop(self, pubsub) -> None:
+        """העברת הודעות מערוץ Redis ללקוחות המחוברים לתהליך הזה."""
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._fanout(message["data"].decode())
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"שגיאה בקבלת הודעות מ-Redis: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
     
     async def connect(self, websocket: WebSocket) -> None:
         """חיבור לקוח חדש."""
         await websocket.accept()
-        self.active_connections.add(websocket)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._QUEUE_SIZE)
+        self.active_connections[websocket] = queue
+        self._writers[websocket] = asyncio.create_task(self._writer(websocket, queue))
         logger.info(f"לקוח WebSocket התחבר. סה\"כ: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket) -> None:
         """ניתוק לקוח."""
-        self.active_connections.discard(websocket)
+        if self.active_connections.pop(websocket, None) is None:
+            return
+        writer = self._writers.pop(websocket, None)
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
         logger.info(f"לקוח WebSocket התנתק. סה\"כ: {len(self.active_connections)}")
     
+    async def _writer(self, websocket: WebSocket, queue: asyncio.Queue) -> None:
+        """שליחת ההודעות מהתור של לקוח בודד, לפי הסדר."""
+        try:
+            while True:
+                payload = await queue.get()
+                await websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.disconnect(websocket)
+    
+    def send(self, websocket: WebSocket, message: dict) -> None:
+        """
+        הכנסת הודעה לתור של לקוח בודד.
+        
+        Args:
+            websocket: חיבור הלקוח
+            message: ההודעה לשליחה
+        """
+        self.send_text(websocket, orjson.dumps(message).decode())
+    
+    def send_text(self, websocket: WebSocket, payload: str) -> None:
+        """
+        הכנסת הודעה שכבר קודדה ל-JSON לתור של לקוח בודד.
+        
+        Args:
+            websocket: חיבור הלקוח
+            payload: ההודעה המקודדת
+        """
+        queue = self.active_connections.get(websocket)
+        if queue is not None:
+            self._put(queue, payload)
+    
+    @staticmethod
+    def _put(queue: asyncio.Queue, payload: str) -> None:
+        """הכנסת הודעה לתור של לקוח, תוך זריקת הישנה ביותר אם התור מלא."""
+        if queue.full():
+            # לקוח תקוע - זריקת ההודעה הישנה ביותר במקום צבירת זיכרון
+            queue.get_nowait()
+            logger.warning("תור WebSocket מלא, הודעה ישנה נזרקה")
+        queue.put_nowait(payload)
+    
     async def broadcast(self, message: dict) -> None:
         """שליחת הודעה לכל הלקוחות המחוברים."""
-        if not self.active_connections:
+        if not self.active_connections and self._redis is None:
             return
         
-        disconnected = set()
-        for connection in self.active_connections:
+        await self.broadcast_text(orjson.dumps(message).decode())
+    
+    async def broadcast_text(self, payload: str) -> None:
+        """שליחת הודעה שכבר קודדה ל-JSON לכל הלקוחות המחוברים."""
+        if self._redis is not None:
             try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.add(connection)
+                await self._redis.publish(self._CHANNEL, payload)
+                return
+            except Exception as e:
+                logger.error(f"שגיאה בפרסום ל-Redis, שידור מקומי בלבד: {e}")
         
-        # הסרת חיבורים מנותקים
-        for conn in disconnected:
-            self.active_connections.discard(conn)
+        self._fanout(payload)
+    
+    def _fanout(self, payload: str) -> None:
+        """הכנסת הודעה מקודדת לתורים של כל הלקוחות בתהליך הזה."""
+        # הכנסה לתור לא משנה את המילון, ולכן אין צורך בהעתקה שלו
+        for queue in self.active_connections.values():
+            self._put(queue, payload)
 
 
 manager = ConnectionManager()
 
+# סימון שהסטטיסטיקות השתנו - נצרך ע"י _stats_loop (נוצר ב-lifespan)
+_stats_dirty: Optional[asyncio.Event] = None
+
+# מטמון סטטיסטיקות: (זמן תפוגה, ערך, הודעת stats_update מקודדת)
+_stats_cache: Optional[Tuple[float, StatsResponse, str]] = None
+# מונה שינויים - ערך שנשלף לפני שינוי לא נשמר במטמון אחריו
+_stats_generation = 0
+
+# הודעת status_update מקודדת, יחד עם תמונת המצב של ה-watcher שממנה נבנתה
+_status_payload: Tuple[Optional[dict], str] = (None, "")
+
+# מטמון אירועים לפי מזהה (LRU) - אירועים לא משתנים אחרי השמירה, רק נמחקים
+_event_cache: "OrderedDict[int, VehicleEvent]" = OrderedDict()
+_EVENT_CACHE_SIZE = 1024
+
+# הודעות new_event מקודדות של האירועים האחרונים (לשליחה ללקוח חדש), מהישן לחדש.
+# None = יש לטעון מחדש מבסיס הנתונים (בהפעלה ואחרי מחיקה)
+_recent_events: Optional[Deque[str]] = None
+_RECENT_EVENTS_SIZE = 20
+# אירועים שנשמרו בזמן טעינת החוצץ - (מזהה, הודעה) לכל טעינה פעילה
+_recent_pending: List[List[Tuple[int, str]]] = []
+# מונה מחיקות - חוצץ שנטען לפני מחיקה לא נשמר אחריה
+_recent_generation = 0
+
+
+def mark_stats_dirty() -> None:
+    """סימון שהסטטיסטיקות השתנו ויש לשדר אותן מחדש."""
+    global _stats_cache, _stats_generation
+    _stats_cache = None
+    _stats_generation += 1
+    if _stats_dirty is not None:
+        _stats_dirty.set()
+
+
+async def _stats_entry() -> Tuple[float, StatsResponse, str]:
+    """
+    רשומת מטמון הסטטיסטיקות (STATS_CACHE_TTL שניות), נשלפת מחדש לפי הצורך.
+    
+    המטמון מתאפס בכל שינוי באירועים (mark_stats_dirty).
+    
+    Returns:
+        tuple של (זמן תפוגה, סטטיסטיקות, הודעת stats_update מקודדת)
+    """
+    global _stats_cache
+    now = time.monotonic()
+    if _stats_cache is not None and now < _stats_cache[0]:
+        return _stats_cache
+    
+    generation = _stats_generation
+    stats = await db.get_stats()
+    payload = orjson.dumps({"type": "stats_update", "data": stats.model_dump()}).decode()
+    entry = (now + config.STATS_CACHE_TTL, stats, payload)
+    if generation == _stats_generation:
+        _stats_cache = entry
+    return entry
+
+
+async def get_cached_stats() -> StatsResponse:
+    """
+    שליפת סטטיסטיקות דרך המטמון.
+    
+    Returns:
+        סטטיסטיקות האירועים
+    """
+    return (await _stats_entry())[1]
+
+
+async def get_stats_payload() -> str:
+    """
+    הודעת stats_update מקודדת, דרך המטמון.
+    
+    Returns:
+        ההודעה כמחרוזת JSON
+    """
+    return (await _stats_entry())[2]
+
+
+def get_status_payload() -> str:
+    """
+    הודעת status_update מקודדת - מקודדת מחדש רק כשסטטוס הניטור השתנה.
+    
+    Returns:
+        ההודעה כמחרוזת JSON
+    """
+    global _status_payload
+    snapshot = watcher.get_status()
+    if _status_payload[0] is not snapshot:
+        _status_payload = (
+            snapshot,
+            orjson.dumps({"type": "status_update", "data": snapshot}).decode()
+        )
+    return _status_payload[1]
+
+
+def _invalidate_recent_events() -> None:
+    """איפוס חוצץ האירועים האחרונים (ייטען מחדש בחיבור הבא)."""
+    global _recent_events, _recent_generation
+    _recent_events = None
+    _recent_generation += 1
+
+
+def _remember_event(event_id: int, payload: str) -> None:
+    """
+    הוספת אירוע חדש לחוצץ האירועים האחרונים.
+    
+    אם החוצץ נטען כרגע מבסיס הנתונים, האירוע נשמר בצד ומצורף בסוף
+    הטעינה (ייתכן שהשליפה לא כוללת אותו).
+    
+    Args:
+        event_id: מזהה האירוע
+        payload: הודעת new_event המקודדת
+    """
+    if _recent_events is not None:
+        _recent_events.append(payload)
+    for pending in _recent_pending:
+        pending.append((event_id, payload))
+
+
+def _new_event_payload(event: VehicleEvent) -> str:
+    """קידוד הודעת new_event לאירוע (פעם אחת, לשידור ולשמירה בחוצץ)."""
+    return orjson.dumps({"type": "new_event", "data": event.model_dump()}).decode()
+
+
+async def get_recent_event_payloads() -> Deque[str]:
+    """
+    הודעות new_event של האירועים האחרונים, מהישן לחדש.
+    
+    Returns:
+        חוצץ ההודעות המקודדות
+    """
+    global _recent_events
+    if _recent_events is not None:
+        return _recent_events
+    
+    generation = _recent_generation
+    pending: List[Tuple[int, str]] = []
+    _recent_pending.append(pending)
+    try:
+        events = await db.get_events(limit=_RECENT_EVENTS_SIZE)
+    finally:
+        _recent_pending.remove(pending)
+    
+    recent = deque(
+        (_new_event_payload(event) for event in reversed(events)),
+        maxlen=_RECENT_EVENTS_SIZE
+    )
+    # אירועים שנשמרו במהלך השליפה ואינם בה
+    last_id = max((event.id for event in events), default=0)
+    recent.extend(payload for event_id, payload in pending if event_id > last_id)
+    
+    # עם Redis אירועים נוצרים גם בתהליכים אחרים - החוצץ המקומי לא נשמר
+    if not manager.has_backplane and generation == _recent_generation:
+        _recent_events = recent
+    return recent
+
+
+async def get_cached_event(event_id: int) -> Optional[VehicleEvent]:
+    """
+    שליפת אירוע לפי מזהה דרך מטמון LRU.
+    
+    Args:
+        event_id: מזהה האירוע
+        
+    Returns:
+        האירוע או None אם לא נמצא
+    """
+    event = _event_cache.get(event_id)
+    if event is not None:
+        _event_cache.move_to_end(event_id)
+        return event
+    
+    event = await db.get_event_by_id(event_id)
+    if event is not None:
+        _event_cache[event_id] = event
+        if len(_event_cache) > _EVENT_CACHE_SIZE:
+            _event_cache.popitem(last=False)
+    return event
+
+
+# פעולות קבצים חוסמות (מחיקה, העברה) רצות ב-threads ייעודיים מחוץ ללולאת האירועים
+_fs_executor = ThreadPoolExecutor(
+    max_workers=config.FS_MAX_WORKERS, thread_name_prefix="moonguard-fs"
+)
+
 
-async def process_new_file(file_path: Path) -> None:
+async def _run_fs(func: Callable, *args: Any) -> Any:
+    """
+    הרצת פעולת מערכת קבצים חוסמת ב-_fs_executor.
+    
+    Args:
+        func: הפעולה (למשל Path.unlink)
+        *args: ארגומנטים לפעולה
+        
+    Returns:
+        תוצאת הפעולה
+    """
+    return await asyncio.get_running_loop().run_in_executor(_fs_executor, func, *args)
+
+
+# האם תיקיית המקור ותיקיית היעד באותה מערכת קבצים (נבדק פעם אחת לכל זוג)
+_same_device: Dict[Tuple[Path, Path], bool] = {}
+
+
+def _move_file(src: Path, dest: Path) -> None:
+    """
+    העברת קובץ (רץ ב-_fs_executor).
+    
+    באותה מערכת קבצים - os.replace (אטומי). בין מערכות קבצים שונות
+    rename נכשל תמיד, ולכן מעבירים ישר ב-shutil.move (העתקה ומחיקה).
+    
+    Args:
+        src: נתיב הקובץ
+        dest: נתיב היעד
+    """
+    key = (src.parent, dest.parent)
+    same = _same_device.get(key)
+    if same is None:
+        same = os.stat(key[0]).st_dev == os.stat(key[1]).st_dev
+        _same_device[key] = same
+        if not same:
+            logger.info(f"תיקיית המעובדים במערכת קבצים אחרת - העברה בהעתקה: {key[1]}")
+    
+    if same:
+        os.replace(src, dest)
+    else:
+        shutil.move(src, dest)
+
+
+async def _stats_loop() -> None:
+    """
+    שידור עדכוני סטטיסטיקות ברקע.
+    
+    כל השינויים שמתרחשים בחלון של STATS_DEBOUNCE_INTERVAL שניות
+    מאוחדים לשאילתה אחת ולשידור אחד.
+    """
+    while True:
+        await _stats_dirty.wait()
+        await asyncio.sleep(config.STATS_DEBOUNCE_INTERVAL)
+        _stats_dirty.clear()
+        try:
+            await manager.broadcast_text(await get_stats_payload())
+        except Exception as e:
+            logger.error(f"שגיאה בשידור סטטיסטיקות: {e}")
+
+
+async def analyze_separately(file_path: Path, lpr: str) -> Tuple[Optional[GovData], dict]:
+    """
+    שליפה ממשלתית וניתוח AI בקריאות נפרדות (כאשר הניתוח המאוחד כבוי).
+    
+    הסינון המקדים אינו תלוי בנתונים הממשלתיים, ולכן רץ במקביל לשליפתם;
+    אם יש לדלג על התמונה השליפה מבוטלת. בדיקת הלוחית הצהובה מתחילה
+    ברגע שהשליפה מחזירה FAKE_PLATE, במקביל לסינון שעדיין רץ.
+    התמונה מקודדת פעם אחת.
+    
+    Args:
+        file_path: נתיב לקובץ התמונה
+        lpr: מספר לוחית הרישוי
+        
+    Returns:
+        tuple של (נתוני הרכב או None אם דולג, מילון במבנה זהה לתוצאת analyze_vehicle_full)
+    """
+    gov_task = asyncio.create_task(get_vehicle_data(lpr))
+    
+    image_data = None
+    try:
+        if await _run_fs(file_path.exists):
+            image_data = await encode_image_to_base64(file_path)
+    except Exception as e:
+        # כל בדיקה תקודד ותדווח על השגיאה בעצמה
+        logger.debug(f"קידוד התמונה נכשל: {e}")
+    
+    async def yellow_after_gov() -> bool:
+        gov = await gov_task
+        if gov.alert_type != "FAKE_PLATE":
+            return False
+        return await detect_yellow_plate(file_path, image_data=image_data)
+    
+    yellow_task = asyncio.create_task(yellow_after_gov())
+    try:
+        pre_screen = await pre_screen_image(file_path, image_data=image_data)
+        if pre_screen.get("skip"):
+            return None, {
+                "skip": True,
+                "reason": pre_screen.get("reason", "none"),
+                "yellow_plate_found": False,
+                "analysis": AIAnalysis()
+            }
+        gov_data = await gov_task
+        has_yellow_plate = await yellow_task
+    finally:
+        gov_task.cancel()
+        yellow_task.cancel()
+    
+    analysis = AIAnalysis()
+    if gov_data.found and not gov_data.alert_type:
+        analysis = await analyze_vehicle_image(file_path, gov_data, lpr, image_data=image_data)
+    
+    return gov_data, {
+        "skip": False,
+        "reason": pre_screen.get("reason", "none"),
+        "yellow_plate_found": has_yellow_plate,
+        "analysis": analysis
+    }
+
+
+async def _prefetch_image(file_path: Path) -> None:
+    """
+    קידוד התמונה מראש, במקביל לשליפה הממשלתית.
+    
+    התוצאה נשמרת במטמון הקידוד של ai_analyzer ומשמשת את הניתוח המאוחד;
+    שגיאה כאן מדווחת שוב בניתוח עצמו.
+    
+    Args:
+        file_path: נתיב לקובץ התמונה
+    """
+    try:
+        await encode_image_to_base64(file_path)
+    except Exception as e:
+        logger.debug(f"קידוד מוקדם נכשל: {e}")
+
+
+def _rejected_plate(lpr: str) -> Optional[str]:
+    """
+    בדיקה אם יש לדלג על לוחית (ולמחוק את התמונה).
+    
+    Args:
+        lpr: מספר הלוחית משם הקובץ
+        
+    Returns:
+        הודעת לוג אם יש לדלג, None אם הלוחית מתאימה לעיבוד
+    """
+    # לוחיות שמכילות אותיות (לא ספרות ASCII בלבד)
+    if not (lpr.isascii() and lpr.isdigit()):
+        return f"התעלמות מלוחית עם אותיות: {lpr}"
+    
+    # אורך לא תקין
+    if not validate_lpr(lpr):
+        return f"לוחית לא תקינה: {lpr}"
+    
+    # לוחיות בנות 7 ספרות המסתיימות ב-90 עד 99 (ספרת עשרות 9)
+    if len(lpr) == 7 and lpr[5] == "9":
+        return f"התעלמות מלוחית 7 ספרות עם סיומת 90-99: {lpr}"
+    
+    return None
+
+
+def prefilter_file(file_path: Path) -> Optional[ParsedName]:
+    """
+    סינון מהיר של קובץ חדש לפני תזמון עיבודו.
+    
+    רץ ב-thread של ה-watcher, כך שקבצים לא רלוונטיים לא יוצרים משימה
+    בלולאת האירועים. תמונה של לוחית שאין לעבד נמחקת מיד.
+    
+    Args:
+        file_path: נתיב לקובץ התמונה
+        
+    Returns:
+        פרטי שם הקובץ (מועברים ל-process_new_file), או None אם אין לעבד אותו
+    """
+    meta = parse_filename(file_path.name)
+    if not meta.valid:
+        logger.warning(f"שם קובץ לא תקין: {file_path.name}")
+        return None
+    
+    reason = _rejected_plate(meta.lpr)
+    if reason is None:
+        return meta
+    
+    try:
+        file_path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError:
+        # הקובץ עדיין פתוח לכתיבה (Windows) - יימחק בעיבוד הרגיל אחרי שייסגר
+        return meta
+    logger.info(reason)
+    return None
+
+
+async def process_new_file(file_path: Path, meta: Optional[ParsedName] = None) -> None:
     """
     עיבוד קובץ תמונה חדש.
     
     Args:
         file_path: נתיב לקובץ התמונה
+        meta: פרטי שם הקובץ מ-prefilter_file (אם None, השם מפורסר כאן)
     """
     filename = file_path.name
     logger.info(f"מעבד קובץ: {filename}")
     
-    # פרסור שם הקובץ
-    meta = parse_filename(filename)
-    if not meta.get("valid"):
-        logger.warning(f"שם קובץ לא תקין: {filename}")
-        return
-    
-    lpr = meta["lpr"]
+    # פרסור שם הקובץ (אם לא נעשה כבר בסינון המהיר)
+    if meta is None:
+        meta = parse_filename(filename)
+        if not meta.valid:
+            logger.warning(f"שם קובץ לא תקין: {filename}")
+            return
     
-    # התעלמות מלוחיות שמכילות אותיות (לא מספרים בלבד)
-    if not lpr.isdigit():
-        logger.info(f"התעלמות מלוחית עם אותיות: {lpr}")
-        try:
-            file_path.unlink()
-        except Exception:
-            pass
-        return
+    lpr = meta.lpr
     
-    # בדיקת תקינות לוחית
-    if not validate_lpr(lpr):
-        logger.warning(f"לוחית לא תקינה: {lpr}")
+    # לוחית שאין לעבד - מחיקת התמונה. בדיקה זולה (ללא פרסור) שנשארת בכוונה:
+    # prefilter_file מעביר לכאן לוחית שנדחתה כשלא הצליח למחוק קובץ פתוח
+    reason = _rejected_plate(lpr)
+    if reason:
+        logger.info(reason)
         try:
-            file_path.unlink()
-            logger.info("קובץ נמחק")
+            await _run_fs(file_path.unlink)
         except Exception as e:
             logger.error(f"שגיאה במחיקת קובץ: {e}")
         return
     
-    location_id = meta["location_id"]
-    
-    # התעלמות מלוחיות בנות 7 ספרות המסתיימות ב-90 עד 99
-    if len(lpr) == 7:
-        last_two_digits = lpr[-2:]
-        if 90 <= int(last_two_digits) <= 99:
-            logger.info(f"התעלמות מלוחית 7 ספרות עם סיומת 90-99: {lpr}")
-            try:
-                file_path.unlink()
-            except Exception:
-                pass
-            return
+    location_id = meta.location_id
     
     logger.info(f"מעבד לוחית: {lpr} | מיקום: {location_id}")
     
+    # יצירת אירוע ראשוני
+    event = VehicleEvent(
+        timestamp=datetime.now(),
+        display_time=meta.display_time,
+        display_date=meta.display_date,
+        location_id=meta.location_id,
+        lpr=lpr,
+        image_filename=filename,
+        image_path=str(file_path),
+        status=EventStatus.PROCESSING
+    )
+    
+    # שליפת נתונים ממשלתיים (בודק בכל המאגרים) וניתוח AI - סינון מקדים,
+    # לוחית צהובה ואימות. עבודה שאינה תלויה בנתונים הממשלתיים רצה במקביל לשליפתם
+    if config.AI_FUSED_ANALYSIS:
+        gov_data, _ = await asyncio.gather(
+            get_vehicle_data(lpr),
+            _prefetch_image(file_path)
+        )
+        vision = await analyze_vehicle_full(file_path, gov_data, lpr)
+    else:
+        gov_data, vision = await analyze_separately(file_path, lpr)
+    
     # סינון מקדים - בדיקה אם יש לדלג על התמונה
-    pre_screen = await pre_screen_image(file_path)
-    if pre_screen.get("skip"):
-        reason = pre_screen.get("reason", "unknown")
+    if vision["skip"]:
+        reason = vision.get("reason", "unknown")
         reason_map = {
             "person": "זוהה אדם בתמונה",
             "taxi": "זוהתה מונית",
@@ -142,25 +656,11 @@ async def process_new_file(file_path: Path) -> None:
         }
         logger.info(f"דילוג על תמונה: {reason_map.get(reason, reason)}")
         try:
-            file_path.unlink()
+            await _run_fs(file_path.unlink)
         except Exception:
             pass
         return
     
-    # יצירת אירוע ראשוני
-    event = VehicleEvent(
-        timestamp=datetime.now(),
-        display_time=meta["display_time"],
-        display_date=meta["display_date"],
-        location_id=meta["location_id"],
-        lpr=lpr,
-        image_filename=filename,
-        image_path=str(file_path),
-        status=EventStatus.PROCESSING
-    )
-    
-    # שליפת נתונים ממשלתיים (בודק בכל המאגרים)
-    gov_data = await get_vehicle_data(lpr)
     event.gov_data = gov_data
     
     # בדיקה אם יש התראה מיוחדת מהמאגרים
@@ -168,13 +668,11 @@ async def process_new_file(file_path: Path) -> None:
         # רכב נמצא במאגר בעייתי או לא נמצא בכלל
         if gov_data.alert_type == "FAKE_PLATE":
             # לפני התראת לוחית מזויפת - בדיקה האם יש לוחית צהובה בתמונה
-            has_yellow_plate = await detect_yellow_plate(file_path)
-            
-            if not has_yellow_plate:
+            if not vision["yellow_plate_found"]:
                 # אין לוחית צהובה בתמונה - התעלמות
                 logger.info(f"לא זוהתה לוחית צהובה בתמונה, מתעלם: {filename}")
                 try:
-                    file_path.unlink()
+                    await _run_fs(file_path.unlink)
                     logger.info("קובץ נמחק - אין לוחית צהובה")
                 except Exception as e:
                     logger.error(f"שגיאה במחיקת קובץ: {e}")
@@ -222,8 +720,8 @@ async def process_new_file(file_path: Path) -> None:
             f"נמצא: {gov_data.manufacturer} {gov_data.model} ({gov_data.color}) - מאגר: {gov_data.source_db}"
         )
         
-        # ניתוח AI
-        ai_result = await analyze_vehicle_image(file_path, gov_data, lpr)
+        # תוצאת אימות ה-AI
+        ai_result = vision["analysis"]
         event.ai_analysis = ai_result
         
         # קבלת החלטה
@@ -241,23 +739,18 @@ async def process_new_file(file_path: Path) -> None:
     # עדכון מונה הקבצים
     watcher.increment_processed()
     
-    # שליחת עדכון ב-WebSocket
-    await manager.broadcast({
-        "type": "new_event",
-        "data": event.model_dump(mode="json")
-    })
+    # שליחת עדכון ב-WebSocket (ההודעה המקודדת נשמרת גם ללקוחות חדשים)
+    payload = _new_event_payload(event)
+    _remember_event(event_id, payload)
+    await manager.broadcast_text(payload)
     
-    # שליחת עדכון סטטיסטיקות
-    stats = await db.get_stats()
-    await manager.broadcast({
-        "type": "stats_update",
-        "data": stats.model_dump()
-    })
+    # עדכון סטטיסטיקות (מאוחד ונשלח ברקע)
+    mark_stats_dirty()
     
     # העברה לתיקיית מעובדים
     try:
         dest = config.PROCESSED_FOLDER / filename
-        file_path.rename(dest)
+        await _run_fs(_move_file, file_path, dest)
         logger.info(f"קובץ הועבר ל: {dest}")
     except Exception as e:
         logger.error(f"שגיאה בהעברת קובץ: {e}")
@@ -279,8 +772,18 @@ async def lifespan(app: FastAPI):
     
     # הגדרת callback ו-loop ל-watcher
     watcher.set_callback(process_new_file)
+    watcher.set_filter(prefilter_file)
     watcher.set_loop(asyncio.get_event_loop())
     
+    # משימת רקע לשידור סטטיסטיקות
+    global _stats_dirty
+    _stats_dirty = asyncio.Event()
+    stats_task = asyncio.create_task(_stats_loop())
+    
+    # שידור בין תהליכים (אופציונלי)
+    if config.REDIS_URL:
+        await manager.start_backplane(config.REDIS_URL)
+    
     logger.info(f"שרת מוכן על פורט {config.SERVER_PORT}")
     
     yield
@@ -288,7 +791,12 @@ async def lifespan(app: FastAPI):
     # סגירה
     logger.info("Server shutting down...")
     watcher.stop()
+    stats_task.cancel()
+    await manager.stop_backplane()
+    await close_ai_client()
+    await close_gov_client()
     await db.disconnect()
+    _fs_executor.shutdown(wait=False)
 
 
 # יצירת אפליקציית FastAPI
@@ -296,17 +804,27 @@ app = FastAPI(
     title="MoonGuard",
     description="מערכת חמ\"ל לאימות רכבים",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # הגדרת CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"]
-)
+# הממשק מוגש מאותו origin, לכן בייצור CORS נדרש רק לרשימת מקורות מפורשת
+if config.DEV:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"]
+    )
+elif config.CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=config.CORS_ORIGINS,
+        allow_methods=["GET", "POST", "DELETE"],
+        allow_headers=["Content-Type"]
+    )
 
 
 # --- API Endpoints ---
@@ -333,19 +851,10 @@ async def get_image(filename: str):
 async def start_watching(request: WatchStartRequest):
     """התחלת ניטור תיקייה."""
     success, message = watcher.start(request.folder_path)
-    
-    status = WatcherStatus(
-        is_active=watcher.is_active,
-        watched_folder=watcher.watched_folder,
-        started_at=watcher.start_time,
-        files_processed=watcher.files_processed
-    )
+    status = watcher.get_status()
     
     # שליחת עדכון סטטוס ללקוחות
-    await manager.broadcast({
-        "type": "status_update",
-        "data": status.model_dump(mode="json")
-    })
+    await manager.broadcast_text(get_status_payload())
     
     return WatchStartResponse(
         success=success,
@@ -359,18 +868,8 @@ async def stop_watching():
     """עצירת הניטור."""
     success, message = watcher.stop()
     
-    status = WatcherStatus(
-        is_active=False,
-        watched_folder=None,
-        started_at=None,
-        files_processed=watcher.files_processed
-    )
-    
     # שליחת עדכון סטטוס ללקוחות
-    await manager.broadcast({
-        "type": "status_update",
-        "data": status.model_dump(mode="json")
-    })
+    await manager.broadcast_text(get_status_payload())
     
     return {"success": success, "message": message}
 
@@ -378,12 +877,8 @@ async def stop_watching():
 @app.get("/api/watch/status", response_model=WatcherStatus)
 async def get_watch_status():
     """קבלת סטטוס הניטור."""
-    return WatcherStatus(
-        is_active=watcher.is_active,
-        watched_folder=watcher.watched_folder,
-        started_at=watcher.start_time,
-        files_processed=watcher.files_processed
-    )
+    # תמונת המצב השמורה נשלחת כמו שהיא, בלי ולידציה מחדש של response_model
+    return ORJSONResponse(watcher.get_status())
 
 
 @app.get("/api/events", response_model=EventsResponse)
@@ -398,10 +893,39 @@ async def get_events(limit: int = 50, offset: int = 0, status: str = None):
     )
 
 
+@app.get("/api/events/summary", response_model=EventSummaryResponse)
+async def get_events_summary(limit: int = 50, offset: int = 0, status: str = None):
+    """שליפת תקצירי אירועים לתצוגת רשימה."""
+    event_status = EventStatus(status) if status else None
+    events = await db.get_events_summary(limit=limit, offset=offset, status=event_status)
+    
+    return EventSummaryResponse(
+        total=len(events),
+        events=events
+    )
+
+
+@app.get("/api/events/stream")
+async def stream_events(limit: int = 50, offset: int = 0, status: str = None):
+    """
+    שליפת אירועים כזרם NDJSON - אירוע אחד בכל שורה.
+    
+    כל אירוע מקודד ונשלח מיד כשנקרא מבסיס הנתונים, בלי לבנות רשימה
+    מלאה ותגובת EventsResponse בזיכרון.
+    """
+    event_status = EventStatus(status) if status else None
+    
+    async def generate() -> AsyncIterator[bytes]:
+        async for event in db.iter_events(limit=limit, offset=offset, status=event_status):
+            yield orjson.dumps(event.model_dump()) + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @app.get("/api/events/{event_id}", response_model=VehicleEvent)
 async def get_event(event_id: int):
     """שליפת אירוע בודד."""
-    event = await db.get_event_by_id(event_id)
+    event = await get_cached_event(event_id)
     if not event:
         raise HTTPException(status_code=404, detail="אירוע לא נמצא")
     return event
@@ -411,15 +935,13 @@ async def get_event(event_id: int):
 async def delete_event(event_id: int):
     """מחיקת אירוע לצמיתות."""
     deleted = await db.delete_event(event_id)
+    _event_cache.pop(event_id, None)
+    _invalidate_recent_events()
     if not deleted:
         raise HTTPException(status_code=404, detail="אירוע לא נמצא")
     
-    # שליחת עדכון סטטיסטיקות
-    stats = await db.get_stats()
-    await manager.broadcast({
-        "type": "stats_update",
-        "data": stats.model_dump()
-    })
+    # עדכון סטטיסטיקות (מאוחד ונשלח ברקע)
+    mark_stats_dirty()
     
     return {"success": True, "message": "אירוע נמחק בהצלחה"}
 
@@ -428,15 +950,13 @@ async def delete_event(event_id: int):
 async def clear_non_alert_events():
     """מחיקת כל האירועים שאינם התראות."""
     deleted_count = await db.delete_non_alert_events()
+    _event_cache.clear()
+    _invalidate_recent_events()
     
-    # שליחת עדכון סטטיסטיקות
-    stats = await db.get_stats()
-    await manager.broadcast({
-        "type": "stats_update",
-        "data": stats.model_dump()
-    })
+    # עדכון סטטיסטיקות (מאוחד ונשלח ברקע)
+    mark_stats_dirty()
     
-    # שליחת אירועים נותרים (רק התראות)
+    # שליחת אירועים נותרים (רק התראות) - הודעת WebSocket אחת, לא זרם
     remaining_events = await db.get_events(limit=100)
     await manager.broadcast({
         "type": "events_cleared",
@@ -459,7 +979,7 @@ async def get_alerts(limit: int = 20):
 @app.get("/api/stats", response_model=StatsResponse)
 async def get_stats():
     """שליפת סטטיסטיקות."""
-    return await db.get_stats()
+    return await get_cached_stats()
 
 
 # --- WebSocket ---
@@ -471,31 +991,16 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         # שליחת סטטוס ראשוני
-        status = WatcherStatus(
-            is_active=watcher.is_active,
-            watched_folder=watcher.watched_folder,
-            started_at=watcher.start_time,
-            files_processed=watcher.files_processed
-        )
-        await websocket.send_json({
-            "type": "status_update",
-            "data": status.model_dump(mode="json")
-        })
+        manager.send_text(websocket, get_status_payload())
         
-        # שליחת סטטיסטיקות ראשוניות
-        stats = await db.get_stats()
-        await websocket.send_json({
-            "type": "stats_update",
-            "data": stats.model_dump()
-        })
-        
-        # שליחת אירועים אחרונים
-        events = await db.get_events(limit=20)
-        for event in reversed(events):
-            await websocket.send_json({
-                "type": "new_event",
-                "data": event.model_dump(mode="json")
-            })
+        # סטטיסטיקות ואירועים אחרונים נשלפים במקביל
+        stats_payload, recent = await asyncio.gather(
+            get_stats_payload(),
+            get_recent_event_payloads()
+        )
+        manager.send_text(websocket, stats_payload)
+        for payload in list(recent):
+            manager.send_text(websocket, payload)
         
         # המתנה להודעות (שמירה על החיבור פתוח)
         while True:
@@ -518,10 +1023,20 @@ if frontend_dir.exists():
 
 
 if __name__ == "__main__":
+    if config.SERVER_WORKERS > 1:
+        logger.warning(
+            "מספר workers גדול מ-1: ניטור התיקייה, המטמונים וחיבורי ה-WebSocket "
+            "נפרדים לכל תהליך"
+        )
     uvicorn.run(
         "backend.main:app",
         host=config.SERVER_HOST,
         port=config.SERVER_PORT,
-        reload=True
+        # uvloop ו-httptools מגיעים עם uvicorn[standard]; uvloop לא זמין ב-Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=config.SERVER_WORKERS,
+        # טעינה מחדש בשינוי קוד - בפיתוח בלבד (תהליך נוסף וניטור קבצים)
+        reload=config.DEV
     )
 
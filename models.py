@@ -64,6 +64,20 @@ class VehicleEvent(BaseModel):
         from_attributes = True
 
 
+class EventSummary(BaseModel):
+    """תקציר אירוע לתצוגת רשימה (ללא פרסור נתוני מאגר וניתוח AI)."""
+    id: int
+    timestamp: datetime
+    display_time: str = ""
+    lpr: str = ""
+    status: EventStatus
+    image_filename: str = ""
+    manufacturer: Optional[str] = None
+    color: Optional[str] = None
+    ai_found: bool = False
+    ai_confidence: int = 0
+
+
 class WatcherStatus(BaseModel):
     """סטטוס ה-File Watcher."""
     is_active: bool = False
@@ -90,6 +104,12 @@ class EventsResponse(BaseModel):
     events: list[VehicleEvent]
 
 
+class EventSummaryResponse(BaseModel):
+    """תגובה לשליפת תקצירי אירועים."""
+    total: int
+    events: list[EventSummary]
+
+
 class StatsResponse(BaseModel):
     """סטטיסטיקות מערכת."""
     total_events: int = 0